@@ -30,6 +30,8 @@ if uploaded_file:
             st.error(f"❌ Error generating video: {e}")
             return None
 
+    # Only the credentials are shared between sessions; each session builds its own client below
+    @st.cache_resource
     def authenticate_youtube():
         SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
         creds_file = "client_secret_838402917099-ifslkerqpdcmqn57glb6c53r7ho8i7uc.apps.googleusercontent.com.json"
@@ -40,12 +42,22 @@ if uploaded_file:
             flow = InstalledAppFlow.from_client_secrets_file(
                 creds_file, SCOPES, redirect_uri="http://localhost:8090/oauth2callback"
             )
-            creds = flow.run_local_server(port=8090)
-            return build("youtube", "v3", credentials=creds)
+            return flow.run_local_server(port=8090)
         except Exception as e:
             st.error(f"❌ Authentication failed: {e}")
             return None
 
+    def get_youtube_client():
+        # httplib2 transports are not thread-safe, so every session (thread) gets its own client
+        if "youtube" not in st.session_state:
+            creds = authenticate_youtube()
+            if creds is None:
+                # Don't keep the failure cached; the next click tries to authenticate again
+                authenticate_youtube.clear()
+                return None
+            st.session_state["youtube"] = build("youtube", "v3", credentials=creds)
+        return st.session_state["youtube"]
+
     def upload_video(youtube, file, title, description, publish_time):
         try:
             request_body = {
@@ -70,7 +82,7 @@ if uploaded_file:
             return None
 
     if st.button("▶️ Start Automation"):
-        youtube = authenticate_youtube()
+        youtube = get_youtube_client()
         if youtube is None:
             st.stop()
 
@@ -0,0 +1,110 @@
+"""Local fake of the YouTube resumable-upload protocol for benchmarks and manual testing.
+
+Usage:
+    server = FakeYouTubeServer(fail_every=0)
+    server.start()
+    ResumableUpload(requests.Session(), path, body, upload_url=server.upload_url).execute()
+    server.stop()
+"""
+import re
+import json
+import uuid
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_RANGE = re.compile(r'bytes (\*|(\d+)-(\d+))/(\d+)')
+
+
+class FakeYouTubeServer:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, fail_every: int = 0):
+        self.sessions = {}
+        self.videos = {}
+        self.fail_every = fail_every  # answer every Nth chunk with a 503
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def upload_url(self) -> str:
+        return f'{self.base_url}/upload/youtube/v3/videos'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, headers=None, body=None):
+                payload = json.dumps(body).encode('utf-8') if body is not None else b''
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(payload)))
+                if body is not None:
+                    self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _read_body(self) -> bytes:
+                length = int(self.headers.get('Content-Length') or 0)
+                return self.rfile.read(length) if length else b''
+
+            def do_POST(self):
+                metadata = json.loads(self._read_body() or b'{}')
+                session_id = uuid.uuid4().hex
+                with server.lock:
+                    server.sessions[session_id] = {
+                        'total': int(self.headers.get('X-Upload-Content-Length', 0)),
+                        'received': 0,
+                        'metadata': metadata
+                    }
+                self._reply(200, {'Location': f'{server.base_url}/upload/session/{session_id}'})
+
+            def do_PUT(self):
+                session_id = self.path.rsplit('/', 1)[-1]
+                data = self._read_body()
+                with server.lock:
+                    session = server.sessions.get(session_id)
+                    server.requests += 1
+                    inject_failure = server.fail_every and server.requests % server.fail_every == 0
+                if session is None:
+                    return self._reply(404, body={'error': 'unknown upload session'})
+
+                match = CONTENT_RANGE.match(self.headers.get('Content-Range', ''))
+                if match is None:
+                    return self._reply(400, body={'error': 'missing Content-Range'})
+
+                if match.group(1) != '*':
+                    if inject_failure:
+                        return self._reply(503, body={'error': 'injected failure'})
+                    start = int(match.group(2))
+                    if start != session['received']:
+                        return self._reply(400, body={'error': 'chunk does not continue the upload'})
+                    session['received'] += len(data)
+
+                if session['received'] >= session['total']:
+                    video_id = session.get('video_id') or uuid.uuid4().hex[:11]
+                    session['video_id'] = video_id
+                    server.videos[video_id] = session['metadata']
+                    return self._reply(201, body={'id': video_id, **session['metadata']})
+
+                headers = {'Range': f"bytes=0-{session['received'] - 1}"} if session['received'] else {}
+                self._reply(308, headers)
+
+        return Handler
@@ -0,0 +1,294 @@
+"""Per-stage benchmarks for the video pipeline.
+
+Each stage runs in its own subprocess against synthetic inputs, so wall time,
+CPU time (including FFmpeg children) and peak RSS are measured in isolation.
+
+    python benchmarks/run_benchmarks.py                      # all stages
+    python benchmarks/run_benchmarks.py --stages excel_load upload
+    python benchmarks/run_benchmarks.py --output bench.json  # save results
+    python benchmarks/run_benchmarks.py --baseline bench.json --tolerance 0.2
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+STAGES = ['startup', 'excel_load', 'background', 'text_overlay', 'composite_encode', 'upload']
+
+SAMPLE_QUOTES = [
+    "The only way to do great work is to love what you do.",
+    "Success is not final, failure is not fatal: it is the courage to continue that counts.",
+    "Believe you can and you're halfway there.",
+    "It always seems impossible until it's done.",
+    "Act as if what you do makes a difference. It does.",
+]
+
+
+def setup_workspace(workdir: str):
+    """Point every configured path at a scratch directory"""
+    from config.settings import Config
+    os.chdir(workdir)
+    Config.TEMP_DIR = os.path.join(workdir, 'temp')
+    Config.CACHE_DIR = os.path.join(workdir, 'cache')
+    Config.RENDER_CACHE_DIR = os.path.join(workdir, 'cache', 'renders')
+    Config.UPLOAD_STATE_DIR = os.path.join(workdir, 'cache', 'uploads')
+    Config.LOGS_DIR = os.path.join(workdir, 'logs')
+    Config.EXCEL_FILE_PATH = os.path.join(workdir, 'bench.xlsx')
+    Config.ensure_directories()
+    return Config
+
+
+def make_workbook(path: str, quote_rows: int, music_rows: int):
+    """Synthetic workbook with the sheets and columns ExcelProcessor expects"""
+    from openpyxl import Workbook
+    from config.settings import Config
+    workbook = Workbook(write_only=True)
+    quotes = workbook.create_sheet(Config.QUOTES_SHEET)
+    quotes.append(['quote', 'title', 'description', 'tags', 'scheduled_time'])
+    for i in range(quote_rows):
+        quote = SAMPLE_QUOTES[i % len(SAMPLE_QUOTES)]
+        quotes.append([f"{quote} #{i}", f"Quote {i}", quote, 'quote,motivation', f"2030-01-01T{i % 24:02d}:00:00"])
+    music = workbook.create_sheet(Config.MUSIC_SHEET)
+    music.append(['music_file', 'duration', 'genre'])
+    for i in range(music_rows):
+        music.append([f"music_{i}.mp3", 30, 'ambient'])
+    workbook.save(path)
+
+
+def make_audio(path: str, seconds: int):
+    """Fixture track generated with FFmpeg's sine source"""
+    from src.ffmpeg_encoder import get_ffmpeg_binary
+    subprocess.run(
+        [get_ffmpeg_binary(), '-y', '-loglevel', 'error', '-f', 'lavfi',
+         '-i', f'sine=frequency=440:duration={seconds}', '-c:a', 'libmp3lame', path],
+        check=True
+    )
+
+
+def stage_startup(args) -> dict:
+    """Launch the CLI, open the menu and exit, as a cron job or a quick command would"""
+    times = []
+    for _ in range(args.launches):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, os.path.join(REPO_ROOT, 'main.py')],
+            input='5\n', capture_output=True, text=True, check=True
+        )
+        times.append(time.perf_counter() - started)
+    return {
+        'items': args.launches, 'unit': 'launches',
+        'extra': {'best_seconds': min(times), 'worst_seconds': max(times)}
+    }
+
+
+def stage_excel_load(args) -> dict:
+    from src.excel_processor import ExcelProcessor
+    from config.settings import Config
+    make_workbook(Config.EXCEL_FILE_PATH, args.rows, 20)
+
+    started = time.perf_counter()
+    processor = ExcelProcessor()
+    for row_index in range(args.rows):
+        processor.get_video_data(row_index)
+    cold = time.perf_counter() - started
+
+    # A fresh processor reuses the on-disk index instead of parsing the workbook
+    started = time.perf_counter()
+    ExcelProcessor().get_video_data(0)
+    warm = time.perf_counter() - started
+    return {'items': args.rows, 'unit': 'rows', 'extra': {'warm_restart_seconds': warm, 'cold_seconds': cold}}
+
+
+def stage_background(args) -> dict:
+    from src import video_generator
+    from config.settings import Config
+    generator = video_generator.VideoGenerator()
+    count = args.iterations
+    for _ in range(count):
+        # Measure building, not cache hits
+        video_generator._background_cache.clear()
+        shutil.rmtree(os.path.join(Config.CACHE_DIR, 'backgrounds'), ignore_errors=True)
+        generator.create_background_image(Config.VIDEO_WIDTH, Config.VIDEO_HEIGHT)
+    return {'items': count, 'unit': 'backgrounds'}
+
+
+def stage_text_overlay(args) -> dict:
+    from src.video_generator import VideoGenerator
+    from config.settings import Config
+    generator = VideoGenerator()
+    count = args.iterations
+    for i in range(count):
+        text = f"{SAMPLE_QUOTES[i % len(SAMPLE_QUOTES)]} #{i}"
+        generator.create_text_image(text, Config.VIDEO_WIDTH, Config.VIDEO_HEIGHT)
+    return {'items': count, 'unit': 'overlays'}
+
+
+def stage_composite_encode(args) -> dict:
+    from src.video_generator import VideoGenerator
+    from config.settings import Config
+    Config.VIDEO_DURATION = args.duration
+    Config.RENDER_CACHE_ENABLED = False
+    make_audio('fixture.mp3', max(1, args.duration // 2))
+
+    generator = VideoGenerator()
+    count = args.videos
+    for i in range(count):
+        video_data = {
+            'quote': {'quote': f"{SAMPLE_QUOTES[i % len(SAMPLE_QUOTES)]} #{i}"},
+            'music': {'music_file': 'fixture.mp3'}
+        }
+        path = generator.generate_video(video_data, profile=args.profile)
+        os.remove(path)
+    return {
+        'items': count, 'unit': 'videos',
+        'extra': {'video_seconds': count * args.duration, 'encode': generator.encode_report()}
+    }
+
+
+def stage_upload(args) -> dict:
+    import requests
+    from fake_youtube import FakeYouTubeServer
+    from src.resumable_upload import ResumableUpload
+    size = args.upload_mb * 1024 * 1024
+    with open('upload.bin', 'wb') as f:
+        f.write(os.urandom(size))
+
+    server = FakeYouTubeServer().start()
+    try:
+        session = requests.Session()
+        for i in range(args.uploads):
+            ResumableUpload(session, 'upload.bin', {'snippet': {'title': f'bench {i}'}},
+                            upload_url=server.upload_url).execute()
+    finally:
+        server.stop()
+    return {'items': args.uploads, 'unit': 'uploads', 'extra': {'megabytes': args.uploads * args.upload_mb}}
+
+
+def run_stage(name: str, args) -> dict:
+    """Run one stage in this process and measure it"""
+    workdir = tempfile.mkdtemp(prefix=f'bench_{name}_')
+    try:
+        setup_workspace(workdir)
+        stage = globals()[f'stage_{name}']
+        self_before = resource.getrusage(resource.RUSAGE_SELF)
+        children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        started = time.perf_counter()
+        result = stage(args)
+        wall = time.perf_counter() - started
+        self_after = resource.getrusage(resource.RUSAGE_SELF)
+        children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    cpu = sum(
+        (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+        for before, after in ((self_before, self_after), (children_before, children_after))
+    )
+    # ru_maxrss is in KiB on Linux
+    peak_rss_mb = max(self_after.ru_maxrss, children_after.ru_maxrss) / 1024
+    result.update({
+        'stage': name,
+        'wall_seconds': wall,
+        'cpu_seconds': cpu,
+        'peak_rss_mb': peak_rss_mb,
+        'throughput_per_second': result['items'] / wall if wall else 0.0
+    })
+    if 'megabytes' in result.get('extra', {}):
+        result['extra']['megabytes_per_second'] = result['extra']['megabytes'] / wall if wall else 0.0
+    return result
+
+
+def run_isolated(name: str, argv: list) -> dict:
+    """Run one stage in a fresh interpreter so peak RSS is not shared between stages"""
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--stage-worker', name] + argv,
+        capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        return {'stage': name, 'error': proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'failed'}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """Stages whose wall or CPU time grew by more than tolerance over the baseline"""
+    regressions = []
+    for result in results:
+        previous = baseline.get(result['stage'])
+        if not previous or 'error' in result or 'error' in previous:
+            continue
+        for metric in ('wall_seconds', 'cpu_seconds'):
+            if previous[metric] > 0 and result[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{result['stage']}: {metric} {previous[metric]:.3f} -> {result[metric]:.3f} "
+                    f"(+{(result[metric] / previous[metric] - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def print_table(results: list):
+    print(f"{'stage':<18}{'wall s':>10}{'cpu s':>10}{'peak MB':>10}{'per s':>12}  unit")
+    for result in results:
+        if 'error' in result:
+            print(f"{result['stage']:<18}  ERROR: {result['error']}")
+            continue
+        print(
+            f"{result['stage']:<18}{result['wall_seconds']:>10.3f}{result['cpu_seconds']:>10.3f}"
+            f"{result['peak_rss_mb']:>10.1f}{result['throughput_per_second']:>12.2f}  {result['unit']}"
+        )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark each stage of the video pipeline')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--launches', type=int, default=5, help='CLI start-ups to time')
+    parser.add_argument('--rows', type=int, default=2000, help='quote rows in the synthetic workbook')
+    parser.add_argument('--iterations', type=int, default=20, help='backgrounds / overlays to build')
+    parser.add_argument('--videos', type=int, default=3, help='videos to render and encode')
+    parser.add_argument('--duration', type=int, default=10, help='seconds per benchmark video')
+    parser.add_argument('--profile', default=None, help='encode profile (default: Config.DEFAULT_ENCODE_PROFILE)')
+    parser.add_argument('--uploads', type=int, default=3)
+    parser.add_argument('--upload-mb', type=int, default=16)
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown before flagging (0.2 = 20%%)')
+    parser.add_argument('--stage-worker', help=argparse.SUPPRESS)
+    return parser.parse_known_args()[0]
+
+
+def main():
+    args = parse_args()
+    if args.stage_worker:
+        print(json.dumps(run_stage(args.stage_worker, args), default=str))
+        return 0
+
+    results = [run_isolated(name, sys.argv[1:]) for name in args.stages]
+    print_table(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({result['stage']: result for result in results}, f, indent=2, default=str)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
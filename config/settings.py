@@ -13,6 +13,17 @@ class Config:
         'https://www.googleapis.com/auth/youtube',
         'https://www.googleapis.com/auth/youtube.force-ssl'
     ]
+    YOUTUBE_UPLOAD_URL = 'https://www.googleapis.com/upload/youtube/v3/videos'
+    
+    # Upload Settings
+    UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # must be a multiple of 256 KiB
+    UPLOAD_MAX_RETRIES = 10
+    UPLOAD_INITIAL_BACKOFF = 1  # seconds, doubled on every retry
+    UPLOAD_MAX_BACKOFF = 64  # seconds
+    UPLOAD_STATE_DIR = 'assets/cache/uploads'  # session URIs and offsets of unfinished uploads
+    UPLOAD_CONCURRENCY = 4  # parallel uploads per process
+    UPLOAD_POOL_SIZE = 4  # pooled HTTPS connections per upload worker
+    BATCH_REQUEST_SIZE = 50  # metadata updates per batched HTTP request
     
     # Video Settings
     VIDEO_WIDTH = 1920
@@ -20,9 +31,68 @@ class Config:
     VIDEO_FPS = 30
     VIDEO_DURATION = 60  # seconds
     
+    # Render Settings
+    STATIC_FAST_PATH = True  # Encode static visuals from a single flattened frame
+    RENDER_WORKERS = os.cpu_count() or 1  # processes used by batch rendering
+    RENDER_SCRATCH_DIR = None  # e.g. '/dev/shm/youtube-automation' to encode in memory-backed storage
+    MUSIC_VOLUME = 0.3  # background music level relative to the source track
+    
+    # Encode Profiles (libx264); threads 0 lets x264 pick, gop_seconds is the keyframe interval
+    ENCODE_PROFILES = {
+        'draft': {  # fast previews
+            'preset': 'ultrafast', 'tune': 'stillimage', 'crf': 30,
+            'gop_seconds': 10, 'threads': 0, 'pix_fmt': 'yuv420p'
+        },
+        'publish': {  # small upload size for mostly static videos
+            'preset': 'slow', 'tune': 'stillimage', 'crf': 21,
+            'gop_seconds': 10, 'threads': 0, 'pix_fmt': 'yuv420p'
+        },
+    }
+    DEFAULT_ENCODE_PROFILE = 'publish'
+    
+    # Render Cache Settings
+    RENDER_CACHE_ENABLED = True
+    RENDER_CACHE_DIR = 'assets/cache/renders'
+    RENDER_CACHE_MAX_BYTES = 20 * 1024 ** 3  # least recently used videos are evicted above this
+    RENDER_CACHE_MIN_AGE = 3600  # seconds a recently used video is protected from eviction
+    
+    # Pipeline Settings
+    PIPELINE_RENDER_WORKERS = os.cpu_count() or 1
+    PIPELINE_UPLOAD_WORKERS = 2
+    PIPELINE_MAX_PENDING = 8  # rendered MP4s allowed on disk at once
+    
+    # Job Store Settings
+    JOB_STORE_PATH = 'data/jobs.db'  # local disk only; one store per host, not for network filesystems
+    JOB_LEASE_SECONDS = 3600  # claims older than this are considered abandoned
+    JOB_MAX_ATTEMPTS = 3
+    
+    # Distributed Render Settings
+    RENDER_BROKER_URL = 'data/render_queue'  # shared directory, 'redis://host:6379/0' or 'memory://'
+    RENDER_OUTPUT_DIR = 'data/rendered'  # shared storage for videos and sidecars, read by the upload node
+    RENDER_VISIBILITY_TIMEOUT = 600  # seconds without a heartbeat before a claimed job is handed out again
+    RENDER_HEARTBEAT_SECONDS = 30
+    
+    # Scheduler Settings
+    SCHEDULER_WORKERS = 2  # scheduled jobs that may run at the same time
+    SCHEDULER_MAX_SLEEP = 3600  # seconds; bounds drift when the wall clock jumps
+    RENDER_LEAD_MINUTES = 0  # start this long before each slot and publish at the slot
+    
+    # Render-Ahead Planner Settings
+    PLAN_DEFAULT_RENDER_SECONDS = 60  # used until real timings are recorded
+    PLAN_DEFAULT_UPLOAD_SECONDS = 120
+    PLAN_SAFETY_FACTOR = 1.5  # padding applied to estimated durations
+    PLAN_MARGIN_MINUTES = 15  # uploads must finish this long before publishAt
+    
+    # Instrumentation Settings
+    METRICS_FILE = 'logs/metrics.prom'  # Prometheus text format, rewritten as stages finish
+    METRICS_FLUSH_SECONDS = 15  # minimum interval between metrics file rewrites
+    METRICS_PORT = 0  # serve /metrics on this port when non-zero
+    TRACE_FILE = 'logs/traces.jsonl'  # one JSON line per finished stage span
+    
     # Paths
     EXCEL_FILE_PATH = 'data/video_data.xlsx'
     TEMP_DIR = 'assets/temp'
+    CACHE_DIR = 'assets/cache'
     FONTS_DIR = 'assets/fonts'
     BACKGROUNDS_DIR = 'assets/backgrounds'
     LOGS_DIR = 'logs'
@@ -30,14 +100,43 @@ class Config:
     # Sheets Configuration
     QUOTES_SHEET = 'Quotes Sheet'
     MUSIC_SHEET = 'Music Sheet'
+    EXCEL_CHUNK_SIZE = 500  # rows per chunk when streaming large workbooks
+    
+    # Music Selection Settings
+    MUSIC_NO_REPEAT_WINDOW = 5  # recently picked tracks are skipped while others qualify
+    DEFAULT_MUSIC_GENRE = None  # preferred genre for quotes without a 'genre' column
     
     # Font Settings
     DEFAULT_FONT = 'assets/fonts/arial.ttf'
     FONT_SIZE = 60
+    TEXT_OVERLAY_CACHE_SIZE = 32  # rendered overlays kept in memory per process
+    
+    # Layout Templates: output size and text layout per aspect ratio; wrap_width is characters per line
+    LAYOUT_TEMPLATES = {
+        'landscape': {'width': VIDEO_WIDTH, 'height': VIDEO_HEIGHT, 'font_size': FONT_SIZE, 'wrap_width': 40},  # 16:9
+        'portrait': {'width': 1080, 'height': 1920, 'font_size': 72, 'wrap_width': 22},  # 9:16 shorts
+        'square': {'width': 1080, 'height': 1080, 'font_size': 64, 'wrap_width': 28},  # 1:1
+    }
+    DEFAULT_LAYOUT = 'landscape'
+    
+    # Effect Settings: durations are seconds from the start; the final frame then holds for the rest
+    EFFECTS = {
+        'fade_in': {'duration': 1.5},  # text fades in
+        'zoom': {'duration': 8.0, 'scale': 1.08},  # background slowly zooms in, then holds
+        'typewriter': {'duration': 3.0},  # text is revealed character by character
+    }
+    DEFAULT_EFFECTS = []  # e.g. ['fade_in', 'zoom']; a quote's 'effects' column overrides this
+    
+    # Background Settings
+    # palette name -> (RGB channel divisors, brightness falloff from top to bottom)
+    GRADIENT_PALETTES = {
+        'default': ((3, 4, 2), 0.3),  # Blue-ish dark
+    }
+    DEFAULT_PALETTE = 'default'
     
     @classmethod
     def ensure_directories(cls):
         """Create necessary directories if they don't exist"""
-        directories = [cls.TEMP_DIR, cls.FONTS_DIR, cls.BACKGROUNDS_DIR, cls.LOGS_DIR]
+        directories = [cls.TEMP_DIR, cls.CACHE_DIR, cls.FONTS_DIR, cls.BACKGROUNDS_DIR, cls.LOGS_DIR]
         for directory in directories:
             os.makedirs(directory, exist_ok=True)
\ No newline at end of file
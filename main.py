@@ -1,19 +1,266 @@
 import os
 import sys
+import json
+import glob
+import signal
+import argparse
+import threading
+from datetime import datetime, timezone
 from src.excel_processor import ExcelProcessor
-from src.video_generator import VideoGenerator
-from src.youtube_uploader import YouTubeUploader
 from src.scheduler import VideoScheduler
 from config.settings import Config
-import logging
+from src.instrumentation import get_logger
+from src.job_store import JobStore, CLAIMABLE_STATES, FAILED
+from src.youtube_uploader import future_publish_time
+from src.render_worker import is_rendered, sidecar_path, sidecar_record, video_path_for, write_sidecar
 import time
 def setup_main_logging():
-    logging.basicConfig(
-        filename=f'{Config.LOGS_DIR}/main.log',
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s'
+    return get_logger(__name__, 'main.log')
+
+def parse_rows(spec: str, row_count: int) -> list:
+    """Row indices from a spec like '0-500' or '3,7,10-20' (ranges are inclusive)"""
+    rows = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            rows.extend(range(int(start), min(int(end), row_count - 1) + 1))
+        else:
+            rows.append(int(part))
+    return [row for row in dict.fromkeys(rows) if 0 <= row < row_count]
+
+def wait_for_shutdown() -> threading.Event:
+    """Event set on SIGINT or SIGTERM so long-running commands can stop cleanly"""
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda signum, frame: stop.set())
+    return stop
+
+def cmd_render(args, logger) -> int:
+    """Render rows into a directory, each video with a JSON sidecar for the upload host"""
+    from src.video_generator import VideoGenerator
+    excel_processor = ExcelProcessor()
+    rows = parse_rows(args.rows, excel_processor.get_row_count()) if args.rows \
+        else list(range(excel_processor.get_row_count()))
+    os.makedirs(args.out, exist_ok=True)
+    
+    # Rows rendered by an earlier run are skipped so the command can simply be re-run
+    pending = []
+    for row_index in rows:
+        if not args.force and is_rendered(video_path_for(args.out, row_index)):
+            continue
+        pending.append(row_index)
+    print(f"Rendering {len(pending)} of {len(rows)} rows into {args.out} with {args.workers} workers")
+    
+    video_generator = VideoGenerator()
+    job_store = JobStore()
+    failed = held = 0
+    for start in range(0, len(pending), Config.EXCEL_CHUNK_SIZE):
+        # Claimed a chunk at a time so workers and the scheduler leave these rows alone meanwhile;
+        # rows they already uploaded are only rendered again with --force
+        chunk = pending[start:start + Config.EXCEL_CHUNK_SIZE]
+        jobs = [job for job in (job_store.claim_row(row_index, args.force) for row_index in chunk) if job]
+        held += len(chunk) - len(jobs)
+        batch = [excel_processor.get_video_data(job['row_index']) for job in jobs]
+        paths = video_generator.generate_batch(batch, workers=args.workers, output_dir=args.out, profile=args.profile)
+        for job, video_data, path in zip(jobs, batch, paths):
+            row_index = job['row_index']
+            if path:
+                video_path = video_path_for(args.out, row_index)
+                os.replace(path, video_path)
+                write_sidecar(sidecar_path(video_path), sidecar_record(row_index, video_path, video_data, args.profile))
+                if job['state'] in CLAIMABLE_STATES:
+                    job_store.mark_rendered(row_index, video_path)
+            else:
+                failed += 1
+            job_store.release(row_index)
+        print(f"Rendered {min(start + len(chunk), len(pending))}/{len(pending)} ({failed} failed, {held} skipped)")
+    
+    logger.info(
+        f"render: {len(pending) - failed - held} rendered, {failed} failed, "
+        f"{len(rows) - len(pending) + held} skipped"
     )
-    return logging.getLogger(__name__)
+    return 1 if failed else 0
+
+def cmd_upload(args, logger) -> int:
+    """Upload every rendered video in a directory that has not been uploaded yet"""
+    from src.upload_service import UploadService
+    job_store = JobStore()
+    # Rows whose upload failed on an earlier run are retried while they have attempts left
+    job_store.retry_failed()
+    items = []
+    exhausted = 0
+    for path in sorted(glob.glob(os.path.join(args.dir, '*.json'))):
+        with open(path) as f:
+            record = json.load(f)
+        video_path = os.path.join(args.dir, record['video'])
+        if record.get('video_id') or not os.path.exists(video_path):
+            continue
+        # The job store is shared with worker and schedule, so each row is uploaded by one of them only
+        if job_store.claim_row(record['row_index']) is None:
+            job = job_store.get_job(record['row_index'])
+            if job and job['video_id']:
+                record['video_id'] = job['video_id']
+                write_sidecar(path, record)
+                print(f"Skipping {record['video']}: already uploaded as {job['video_id']}")
+            elif job and job['state'] == FAILED:
+                exhausted += 1
+                print(f"Failed {record['video']} after {job['attempts']} attempts: {job['error']}")
+            else:
+                print(f"Skipping {record['video']}: being processed by another worker")
+            continue
+        items.append((path, record, video_path))
+    print(f"Uploading {len(items)} videos from {args.dir} with concurrency {args.concurrency}")
+    
+    service = UploadService(concurrency=args.concurrency)
+    futures = [service.submit(video_path, record['video_data']) for _, record, video_path in items]
+    failed = 0
+    for (path, record, video_path), future in zip(items, futures):
+        try:
+            record['video_id'] = future.result()
+        except Exception as e:
+            failed += 1
+            # Keeps the video's path, so a retry by any command or worker uploads it without rendering again
+            job_store.mark_failed(record['row_index'], str(e), video_path)
+            logger.error(f"upload: {video_path} failed: {str(e)}")
+            print(f"Failed {record['video']}: {str(e)}")
+            continue
+        if future_publish_time(record['video_data']['quote'].get('scheduled_time')):
+            job_store.mark_scheduled(record['row_index'], record['video_id'])
+        else:
+            job_store.mark_uploaded(record['row_index'], record['video_id'])
+        record['uploaded_at'] = datetime.now(timezone.utc).isoformat()
+        write_sidecar(path, record)
+        if not args.keep:
+            os.remove(video_path)
+        print(f"Uploaded {record['video']} as {record['video_id']}")
+    service.shutdown()
+    
+    logger.info(f"upload: {len(items) - failed} uploaded, {failed} failed, {exhausted} out of attempts")
+    return 1 if failed or exhausted else 0
+
+def cmd_schedule(args, logger) -> int:
+    """Run the event scheduler in the foreground until SIGINT or SIGTERM"""
+    scheduler = VideoScheduler()
+    if args.times:
+        times = [t.strip() for t in args.times.split(',') if t.strip()]
+        scheduler.schedule_multiple_videos(times, args.lead)
+    else:
+        plan = scheduler.schedule_render_ahead()
+        print(f"Planned {len(plan)} renders from scheduled_time")
+    
+    stop = wait_for_shutdown()
+    scheduler.run_scheduler()
+    print("Scheduler running. Send SIGINT or SIGTERM to stop.")
+    stop.wait()
+    scheduler.stop_scheduler()
+    logger.info("schedule: stopped")
+    return 0
+
+def cmd_worker(args, logger) -> int:
+    """Claim and process pending jobs from the job store until stopped (or drained with --once)"""
+    if args.broker:
+        return run_render_worker(args, logger)
+    scheduler = VideoScheduler()
+    stop = wait_for_shutdown()
+    processed = failed = streak = 0
+    while not stop.is_set():
+        try:
+            video_id = scheduler.process_video()
+            streak = 0
+        except Exception as e:
+            # The job is marked failed in the store; keep serving the rest of the queue,
+            # backing off if every attempt fails (e.g. the workbook or credentials are broken)
+            failed += 1
+            streak += 1
+            logger.error(f"worker: job failed: {str(e)}")
+            stop.wait(min(args.poll, 2 ** (streak - 1) - 1))
+            continue
+        if video_id is None:
+            if args.once:
+                break
+            stop.wait(args.poll)
+            continue
+        processed += 1
+    
+    logger.info(f"worker: {processed} processed, {failed} failed")
+    print(f"Worker stopped: {processed} processed, {failed} failed")
+    return 1 if failed and args.once else 0
+
+def run_render_worker(args, logger) -> int:
+    """Render jobs from a broker into shared storage; with --submit, queue rows from the workbook first"""
+    from src.render_broker import get_broker
+    from src.render_worker import RenderWorker, render_job
+    broker = get_broker(args.broker)
+    if args.submit:
+        # Quote and music are resolved here, so render nodes need neither the workbook nor the music index
+        excel_processor = ExcelProcessor()
+        rows = parse_rows(args.submit, excel_processor.get_row_count())
+        for row_index in rows:
+            video_data = excel_processor.get_video_data(row_index)
+            broker.submit(render_job(row_index, video_data, args.profile, args.layout, args.force))
+        print(f"Queued {len(rows)} render jobs on {args.broker}")
+        logger.info(f"worker: queued {len(rows)} render jobs on {args.broker}")
+        if args.submit_only:
+            return 0
+    
+    worker = RenderWorker(broker, args.out)
+    processed, failed = worker.run(wait_for_shutdown(), once=args.once, poll=args.poll)
+    logger.info(f"worker: {processed} rendered, {failed} failed, queue {broker.counts()}")
+    print(f"Render worker stopped: {processed} rendered, {failed} failed; queue {broker.counts()}")
+    return 1 if failed and args.once else 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='YouTube video automation; run without a command for the menu')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    render = subparsers.add_parser('render', help='render rows to a directory with JSON sidecars')
+    render.add_argument('--rows', help="rows to render, e.g. '0-500' or '1,4,10-20' (default: all)")
+    render.add_argument('--workers', type=int, default=Config.RENDER_WORKERS)
+    render.add_argument('--out', default=Config.TEMP_DIR, help='output directory')
+    render.add_argument('--profile', choices=list(Config.ENCODE_PROFILES), help='encode profile')
+    render.add_argument('--force', action='store_true', help='re-render rows that already have output')
+    render.set_defaults(func=cmd_render)
+    
+    upload = subparsers.add_parser('upload', help='upload rendered videos from a directory')
+    upload.add_argument('--dir', required=True, help='directory written by the render command')
+    upload.add_argument('--concurrency', type=int, default=Config.UPLOAD_CONCURRENCY)
+    upload.add_argument('--keep', action='store_true', help='keep video files after upload')
+    upload.set_defaults(func=cmd_upload)
+    
+    schedule = subparsers.add_parser('schedule', help='run the scheduler in the foreground')
+    schedule.add_argument('--times', help="daily HH:MM slots, e.g. '09:00,15:00' (default: plan from scheduled_time)")
+    schedule.add_argument('--lead', type=float, default=None, help='render lead time in minutes')
+    schedule.set_defaults(func=cmd_schedule)
+    
+    worker = subparsers.add_parser('worker', help='process pending jobs from the job store, or render jobs from a broker')
+    worker.add_argument('--poll', type=float, default=30, help='seconds to wait when the queue is empty')
+    worker.add_argument('--once', action='store_true', help='exit when the queue is empty')
+    worker.add_argument('--broker', nargs='?', const=Config.RENDER_BROKER_URL,
+                        help='render jobs from a broker instead: a shared directory, redis://host:6379/0 or '
+                             f'memory:// (default: {Config.RENDER_BROKER_URL})')
+    worker.add_argument('--submit', metavar='ROWS', help="queue these rows on the broker first, e.g. '0-500'")
+    worker.add_argument('--submit-only', action='store_true', help='exit after queueing rows')
+    worker.add_argument('--out', default=Config.RENDER_OUTPUT_DIR, help='shared output directory for renders')
+    worker.add_argument('--profile', choices=list(Config.ENCODE_PROFILES), help='encode profile of queued rows')
+    worker.add_argument('--layout', choices=list(Config.LAYOUT_TEMPLATES), help='layout of queued rows')
+    worker.add_argument('--force', action='store_true', help='re-render queued rows that already have output')
+    worker.set_defaults(func=cmd_worker)
+    return parser
+
+def run_command(argv: list) -> int:
+    """Run one non-interactive subcommand and return its exit code"""
+    args = build_parser().parse_args(argv)
+    logger = setup_main_logging()
+    Config.ensure_directories()
+    try:
+        return args.func(args, logger)
+    except Exception as e:
+        logger.error(f"{args.command} failed: {str(e)}")
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
 
 def main():
     """Main function to run the YouTube automation system"""
@@ -26,11 +273,9 @@ def main():
         print("YouTube Video Automation System")
         print("=" * 40)
         
-        # Initialize components
+        # Initialize components; the scheduler (job store, uploader, renderer) is built on first use
         excel_processor = ExcelProcessor()
-        video_generator = VideoGenerator()
-        youtube_uploader = YouTubeUploader()
-        scheduler = VideoScheduler()
+        scheduler = None
         
         # Menu options
         while True:
@@ -46,9 +291,12 @@ def main():
             if choice == '1':
                 try:
                     row_index = int(input("Enter row index (0-based): "))
-                    scheduler.current_row = row_index
-                    scheduler.process_video()
-                    print("Video processed successfully!")
+                    scheduler = scheduler or VideoScheduler()
+                    # An explicit request, so rows that are already uploaded are processed again
+                    if scheduler.process_video(row_index, force=True) is None:
+                        print(f"Video {row_index} is being processed by another worker")
+                    else:
+                        print("Video processed successfully!")
                 except Exception as e:
                     print(f"Error processing video: {str(e)}")
             
@@ -56,7 +304,9 @@ def main():
                 time_str = input("Enter time (HH:MM format, default 09:00): ").strip()
                 if not time_str:
                     time_str = "09:00"
-                scheduler.schedule_daily_video(time_str)
+                lead_input = input("Render lead time in minutes (default 0): ").strip()
+                scheduler = scheduler or VideoScheduler()
+                scheduler.schedule_daily_video(time_str, float(lead_input) if lead_input else None)
                 scheduler.run_scheduler()
                 print(f"Daily video scheduled at {time_str}")
                 print("Scheduler running in background. Press Ctrl+C to stop.")
@@ -64,12 +314,15 @@ def main():
                     while True:
                         time.sleep(1)
                 except KeyboardInterrupt:
+                    scheduler.stop_scheduler()
                     print("\nScheduler stopped.")
             
             elif choice == '3':
                 times_input = input("Enter times separated by comma (e.g., 09:00,15:00,21:00): ")
                 times = [t.strip() for t in times_input.split(',')]
-                scheduler.schedule_multiple_videos(times)
+                lead_input = input("Render lead time in minutes (default 0): ").strip()
+                scheduler = scheduler or VideoScheduler()
+                scheduler.schedule_multiple_videos(times, float(lead_input) if lead_input else None)
                 scheduler.run_scheduler()
                 print(f"Videos scheduled at times: {times}")
                 print("Scheduler running in background. Press Ctrl+C to stop.")
@@ -77,17 +330,24 @@ def main():
                     while True:
                         time.sleep(1)
                 except KeyboardInterrupt:
+                    scheduler.stop_scheduler()
                     print("\nScheduler stopped.")
             
             elif choice == '4':
                 try:
-                    quotes_df, music_df = excel_processor.read_excel_data()
-                    print(f"Quotes data shape: {quotes_df.shape}")
-                    print(f"Music data shape: {music_df.shape}")
-                    print("\nQuotes columns:", list(quotes_df.columns))
-                    print("Music columns:", list(music_df.columns))
+                    quote_count = 0
+                    first_quote = None
+                    for chunk in excel_processor.iter_records():
+                        if first_quote is None:
+                            first_quote = chunk[0]
+                        quote_count += len(chunk)
+                    music_rows = excel_processor.get_music_rows()
+                    print(f"Quotes rows: {quote_count}")
+                    print(f"Music rows: {len(music_rows)}")
+                    print("\nQuotes columns:", list(first_quote.keys()) if first_quote else [])
+                    print("Music columns:", list(music_rows[0].keys()))
                     print("\nFirst quote:")
-                    print(quotes_df.iloc[0].to_dict())
+                    print(first_quote)
                 except Exception as e:
                     print(f"Error reading Excel data: {str(e)}")
             
@@ -103,4 +363,6 @@ def main():
         print(f"Error: {str(e)}")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_command(sys.argv[1:]))
     main()
\ No newline at end of file
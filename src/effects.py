@@ -0,0 +1,125 @@
+import math
+import numpy as np
+from typing import Dict, Iterator
+from PIL import Image
+
+EFFECT_NAMES = ('fade_in', 'zoom', 'typewriter')
+
+
+def ease_out(progress: float) -> float:
+    """Quadratic ease-out over 0..1"""
+    return 1 - (1 - progress) ** 2
+
+
+def animation_seconds(effects: Dict[str, dict]) -> float:
+    """How long the longest effect runs; the frame after that holds for the rest of the video"""
+    return max((params['duration'] for params in effects.values()), default=0.0)
+
+
+class QuoteAnimation:
+    """Animated quote frames built with NumPy from a cached background and text overlay"""
+
+    def __init__(self, background: np.ndarray, overlay: np.ndarray, effects: Dict[str, dict],
+                 line_count: int = 1, char_count: int = 1, opacity: float = 0.9):
+        self.background = background
+        self.effects = effects
+        self.height, self.width = background.shape[:2]
+
+        # Only the text's bounding box is blended per frame; everything else is background
+        alpha = overlay[..., 3]
+        rows = np.flatnonzero(alpha.any(axis=1))
+        cols = np.flatnonzero(alpha.any(axis=0))
+        if len(rows):
+            self.box = (rows[0], rows[-1] + 1, cols[0], cols[-1] + 1)
+        else:
+            self.box = (0, 0, 0, 0)
+        top, bottom, left, right = self.box
+        self.alpha = alpha[top:bottom, left:right].astype(np.float32) * (opacity / 255)
+        self.text_rgb = overlay[top:bottom, left:right, :3].astype(np.float32)
+
+        self._background_image = Image.fromarray(background) if 'zoom' in effects else None
+        self.char_count = max(char_count, 1)
+        self.lines = self._line_spans(line_count) if 'typewriter' in effects else []
+
+    def _line_spans(self, line_count: int) -> list:
+        """(top, bottom, left, right) of each text line inside the box, split evenly by height"""
+        box_height = self.alpha.shape[0]
+        line_count = max(line_count, 1)
+        spans = []
+        for i in range(line_count):
+            top = box_height * i // line_count
+            bottom = box_height * (i + 1) // line_count
+            cols = np.flatnonzero(self.alpha[top:bottom].any(axis=0))
+            if len(cols):
+                spans.append((top, bottom, cols[0], cols[-1] + 1))
+        return spans
+
+    def state(self, t: float) -> tuple:
+        """Everything that changes a frame at time t; equal states render identical frames"""
+        def progress(name):
+            duration = self.effects[name]['duration']
+            return min(t / duration, 1.0) if duration > 0 else 1.0
+
+        # Zoom is tracked as a crop width whose edges move in whole pixels; finer steps would not be
+        # visible but would each cost a resampled frame
+        crop_width = self.width
+        if 'zoom' in self.effects:
+            scale = 1 + (self.effects['zoom']['scale'] - 1) * ease_out(progress('zoom'))
+            crop_width = self.width - 2 * int(round((self.width - self.width / scale) / 2))
+        fade = 255
+        if 'fade_in' in self.effects:
+            fade = int(255 * progress('fade_in'))
+        revealed = self.char_count
+        if 'typewriter' in self.effects:
+            revealed = int(self.char_count * progress('typewriter'))
+        return crop_width, fade, revealed
+
+    def render(self, state: tuple) -> np.ndarray:
+        """Compose one RGB frame for a state"""
+        crop_width, fade, revealed = state
+        if crop_width != self.width:
+            # Centre crop scaled back up to the frame size
+            crop_height = self.height * crop_width / self.width
+            left, top = (self.width - crop_width) / 2, (self.height - crop_height) / 2
+            frame = np.array(self._background_image.resize(
+                (self.width, self.height), Image.BILINEAR,
+                box=(left, top, left + crop_width, top + crop_height)
+            ))
+        else:
+            frame = self.background.copy()
+
+        alpha = self.alpha
+        if fade < 255:
+            alpha = alpha * (fade / 255)
+        if revealed < self.char_count:
+            alpha = alpha * self._reveal_mask(revealed)
+
+        top, bottom, left, right = self.box
+        region = frame[top:bottom, left:right].astype(np.float32)
+        region += (self.text_rgb - region) * alpha[..., None]
+        frame[top:bottom, left:right] = region.astype(np.uint8)
+        return frame
+
+    def _reveal_mask(self, revealed: int) -> np.ndarray:
+        """Mask showing the first revealed characters, typed line by line from the left"""
+        mask = np.zeros(self.alpha.shape, dtype=np.float32)
+        total_width = sum(right - left for _, _, left, right in self.lines)
+        remaining = total_width * revealed / self.char_count
+        for top, bottom, left, right in self.lines:
+            if remaining <= 0:
+                break
+            shown = min(right - left, int(math.ceil(remaining)))
+            mask[top:bottom, :left + shown] = 1
+            remaining -= right - left
+        return mask
+
+    def frames(self, fps: int) -> Iterator[np.ndarray]:
+        """Frames until the animation settles; unchanged states yield the previous frame again"""
+        count = max(int(math.ceil(animation_seconds(self.effects) * fps)), 0) + 1
+        last_state, frame = None, None
+        for index in range(count):
+            state = self.state(index / fps)
+            if state != last_state:
+                frame = self.render(state)
+                last_state = state
+            yield frame
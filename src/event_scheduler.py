@@ -0,0 +1,144 @@
+import heapq
+import itertools
+import threading
+import time
+from datetime import date, datetime, time as time_of_day, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from src.instrumentation import get_logger, get_metrics
+from config.settings import Config
+
+
+def local_slot(day: date, at: time_of_day) -> datetime:
+    """Wall-clock time on a calendar day, with the local UTC offset in effect that day"""
+    return datetime.combine(day, at).astimezone()
+
+
+class ScheduledJob:
+    """A callable due at a wall-clock time, optionally repeating every day"""
+
+    def __init__(self, func, run_at: datetime, slot: datetime = None, daily: bool = False,
+                 lead: timedelta = timedelta(0), name: str = None, at: time_of_day = None):
+        self.func = func
+        self.run_at = run_at
+        self.slot = slot or run_at
+        self.daily = daily
+        self.lead = lead
+        self.name = name or getattr(func, '__name__', 'job')
+        self.cancelled = False
+        # Daily jobs repeat at this local wall-clock time, whatever the UTC offset on the day
+        self.time_of_day = at or self.slot.time()
+
+    def advance(self):
+        """Move a daily job to the same local time on the next day, so DST changes do not shift it"""
+        self.slot = local_slot(self.slot.date() + timedelta(days=1), self.time_of_day)
+        self.run_at = self.slot - self.lead
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class EventScheduler:
+    """Heap-based scheduler that sleeps until the next due job and runs jobs on a worker pool"""
+
+    def __init__(self, workers: int = None):
+        self.workers = workers or Config.SCHEDULER_WORKERS
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._executor = None
+        self._thread = None
+        self._running = False
+        self.metrics = get_metrics()
+        self.setup_logging()
+
+    def setup_logging(self):
+        self.logger = get_logger(__name__, 'scheduler.log')
+
+    def _push(self, job: ScheduledJob) -> ScheduledJob:
+        with self._condition:
+            heapq.heappush(self._heap, (job.run_at.timestamp(), next(self._counter), job))
+            self.metrics.set_gauge('scheduler_pending_jobs', len(self._heap))
+            # Wake the timer thread in case this job is due before the one it is waiting for
+            self._condition.notify()
+        return job
+
+    def add_at(self, run_at: datetime, func, slot: datetime = None, name: str = None) -> ScheduledJob:
+        """Run func(slot) once at run_at (local time when naive)"""
+        return self._push(ScheduledJob(func, run_at.astimezone(), slot=slot, name=name))
+
+    def add_daily(self, time_str: str, func, lead_minutes: float = 0, name: str = None) -> ScheduledJob:
+        """Run func(slot) every day, lead_minutes before the HH:MM slot"""
+        hour, minute = (int(part) for part in time_str.split(':'))
+        lead = timedelta(minutes=lead_minutes)
+        at = time_of_day(hour, minute)
+        now = datetime.now().astimezone()
+        slot = local_slot(now.date(), at)
+        job = ScheduledJob(func, slot - lead, slot=slot, daily=True, lead=lead, name=name, at=at)
+        while job.run_at <= now:
+            job.advance()
+        return self._push(job)
+
+    def start(self):
+        """Start the timer thread"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scheduled-job')
+        self._thread = threading.Thread(target=self._run, name='event-scheduler', daemon=True)
+        self._thread.start()
+        self.logger.info(f"Event scheduler started with {self.workers} workers")
+
+    def stop(self, wait: bool = True):
+        """Stop dispatching jobs, optionally waiting for running ones"""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread:
+            self._thread.join()
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+        self.logger.info("Event scheduler stopped")
+
+    def pending_jobs(self) -> list:
+        with self._condition:
+            return [job for _, _, job in sorted(self._heap) if not job.cancelled]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+
+                due_at, _, job = self._heap[0]
+                delay = due_at - time.time()
+                if delay > 0:
+                    # Due times are absolute, so DST needs no wake-up; the cap picks up a system clock
+                    # that was stepped (NTP, manual change) while waiting
+                    self._condition.wait(min(delay, Config.SCHEDULER_MAX_SLEEP))
+                    continue
+
+                heapq.heappop(self._heap)
+                self.metrics.set_gauge('scheduler_pending_jobs', len(self._heap))
+
+            if job.cancelled:
+                continue
+            self._dispatch(job)
+            if job.daily:
+                job.advance()
+                self._push(job)
+
+    def _dispatch(self, job: ScheduledJob):
+        late = time.time() - job.run_at.timestamp()
+        self.metrics.observe('scheduler_dispatch_delay_seconds', max(late, 0))
+        self.logger.info(f"Dispatching {job.name} for slot {job.slot.isoformat()} ({late:.2f}s after due)")
+        future = self._executor.submit(job.func, job.slot)
+        future.add_done_callback(lambda f: self._log_result(job, f))
+
+    def _log_result(self, job: ScheduledJob, future):
+        error = future.exception()
+        if error is not None:
+            self.logger.error(f"Scheduled job {job.name} for slot {job.slot.isoformat()} failed: {str(error)}")
@@ -1,23 +1,37 @@
-import pandas as pd
-import logging
-from typing import Dict, List, Tuple
+import os
+import csv
+import pickle
+import hashlib
+import uuid
+from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple
+from src.instrumentation import get_logger, get_metrics
+from src.music_index import MusicIndex
 from config.settings import Config
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 class ExcelProcessor:
+    REQUIRED_QUOTE_COLUMNS = ['quote', 'title', 'description', 'tags', 'scheduled_time']
+    REQUIRED_MUSIC_COLUMNS = ['music_file', 'duration', 'genre']
+    
     def __init__(self, excel_path: str = None):
         self.excel_path = excel_path or Config.EXCEL_FILE_PATH
         self.setup_logging()
+        self.metrics = get_metrics()
+        self._index = None
+        self._index_stat = None
+        self._music_rows = None
+        self._music_index = None
+        self._music_index_source = None
     
     def setup_logging(self):
-        logging.basicConfig(
-            filename=f'{Config.LOGS_DIR}/excel_processor.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
-        self.logger = logging.getLogger(__name__)
-    
-    def read_excel_data(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        self.logger = get_logger(__name__, 'excel_processor.log')
+    
+    def read_excel_data(self) -> Tuple['pd.DataFrame', 'pd.DataFrame']:
         """Read quotes and music data from Excel file"""
+        # Loaded on first use; most runs are served from the index cache without pandas
+        import pandas as pd
         try:
             quotes_df = pd.read_excel(self.excel_path, sheet_name=Config.QUOTES_SHEET)
             music_df = pd.read_excel(self.excel_path, sheet_name=Config.MUSIC_SHEET)
@@ -29,10 +43,10 @@ class ExcelProcessor:
             self.logger.error(f"Error reading Excel file: {str(e)}")
             raise
     
-    def validate_data(self, quotes_df: pd.DataFrame, music_df: pd.DataFrame) -> bool:
+    def validate_data(self, quotes_df: 'pd.DataFrame', music_df: 'pd.DataFrame') -> bool:
         """Validate required columns exist in dataframes"""
-        required_quote_columns = ['quote', 'title', 'description', 'tags', 'scheduled_time']
-        required_music_columns = ['music_file', 'duration', 'genre']
+        required_quote_columns = self.REQUIRED_QUOTE_COLUMNS
+        required_music_columns = self.REQUIRED_MUSIC_COLUMNS
         
         quote_columns_valid = all(col in quotes_df.columns for col in required_quote_columns)
         music_columns_valid = all(col in music_df.columns for col in required_music_columns)
@@ -45,23 +59,211 @@ class ExcelProcessor:
         
         return quote_columns_valid and music_columns_valid
     
-    def get_video_data(self, row_index: int = 0) -> Dict:
-        """Get video data for specific row"""
+    def load_index(self) -> Dict:
+        """Load the parsed workbook as column arrays, re-parsing only when the file changed"""
+        stat = os.stat(self.excel_path)
+        file_stat = (stat.st_mtime_ns, stat.st_size)
+        if self._index is not None and self._index_stat == file_stat:
+            return self._index
+        
+        with self.metrics.span('load', source='index_cache') as span:
+            cache_path = self._index_cache_path()
+            cached = self._read_index_cache(cache_path)
+            if cached and cached['stat'] == file_stat:
+                index = cached['index']
+            else:
+                file_hash = self._hash_file()
+                if cached and cached['sha256'] == file_hash:
+                    # Touched but unchanged: keep the parsed data, refresh the stat
+                    index = cached['index']
+                else:
+                    span['source'] = 'workbook'
+                    span['bytes_read'] = stat.st_size
+                    index = self._build_index()
+                self._write_index_cache(cache_path, {'stat': file_stat, 'sha256': file_hash, 'index': index})
+            span['rows'] = index['quote_count']
+        
+        self._index = index
+        self._index_stat = file_stat
+        return index
+    
+    def _build_index(self) -> Dict:
+        """Parse and validate both sheets into column arrays"""
         quotes_df, music_df = self.read_excel_data()
         
         if not self.validate_data(quotes_df, music_df):
             raise ValueError("Invalid Excel data structure")
         
-        if row_index >= len(quotes_df):
+        return {
+            'quotes': quotes_df.to_dict('list'),
+            'music': music_df.to_dict('list'),
+            'quote_count': len(quotes_df),
+            'music_count': len(music_df)
+        }
+    
+    def _index_cache_path(self) -> str:
+        """Sidecar cache file for this workbook"""
+        key = hashlib.sha1(os.path.abspath(self.excel_path).encode('utf-8')).hexdigest()
+        return os.path.join(Config.CACHE_DIR, 'excel', f"{key}.pkl")
+    
+    def _hash_file(self) -> str:
+        """SHA-256 of the workbook contents"""
+        digest = hashlib.sha256()
+        with open(self.excel_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _read_index_cache(self, cache_path: str):
+        """Read the sidecar cache, ignoring it if missing or unreadable"""
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable Excel cache {cache_path}: {str(e)}")
+            return None
+    
+    def _write_index_cache(self, cache_path: str, cached: Dict):
+        """Atomically replace the sidecar cache"""
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+        self.logger.info(f"Excel index cached: {cache_path}")
+    
+    def get_row_count(self) -> int:
+        """Number of quote rows in the workbook"""
+        return self.load_index()['quote_count']
+    
+    def get_quote(self, row_index: int) -> Dict:
+        """Get one quote row as a dict"""
+        index = self.load_index()
+        if row_index < 0 or row_index >= index['quote_count']:
             raise IndexError(f"Row index {row_index} out of range")
+        return {column: values[row_index] for column, values in index['quotes'].items()}
+    
+    def get_music(self, music_index: int) -> Dict:
+        """Get one music row as a dict"""
+        index = self.load_index()
+        return {column: values[music_index] for column, values in index['music'].items()}
+    
+    def get_music_index(self) -> MusicIndex:
+        """Track index over the music sheet, rebuilt when the workbook changes"""
+        index = self.load_index()
+        if self._music_index is None or self._music_index_source is not index:
+            rows = [self.get_music(music_index) for music_index in range(index['music_count'])]
+            self._music_index = MusicIndex(rows)
+            self._music_index_source = index
+        return self._music_index
+    
+    def get_video_data(self, row_index: int = 0) -> Dict:
+        """Get video data for specific row"""
+        quote_data = self.get_quote(row_index)
         
-        quote_data = quotes_df.iloc[row_index].to_dict()
-        
-        # Select random music if not specified
-        import random
-        music_data = music_df.iloc[random.randint(0, len(music_df) - 1)].to_dict()
+        # Pick a track long enough for the video, in the quote's genre if it has one
+        music_data = self.get_music_index().select(quote_data.get('genre'))
         
         return {
             'quote': quote_data,
             'music': music_data
         }
+    
+    def iter_records(self, path: str = None, sheet_name: str = None, required_columns: List[str] = None,
+                     chunk_size: int = None, with_index: bool = False) -> Iterator[List]:
+        """Stream validated row records in fixed-size chunks from an XLSX, CSV or Parquet file;
+        with_index yields (row_index, record) pairs numbered like get_quote, blank rows included"""
+        path = path or self.excel_path
+        sheet_name = sheet_name or Config.QUOTES_SHEET
+        required_columns = required_columns or self.REQUIRED_QUOTE_COLUMNS
+        chunk_size = chunk_size or Config.EXCEL_CHUNK_SIZE
+        
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            rows = self._iter_csv_rows(path)
+        elif extension == '.parquet':
+            rows = self._iter_parquet_rows(path, chunk_size)
+        else:
+            rows = self._iter_xlsx_rows(path, sheet_name)
+        
+        chunk = []
+        header_checked = False
+        for row_index, record in enumerate(rows):
+            if not header_checked:
+                missing = [col for col in required_columns if col not in record]
+                if missing:
+                    self.logger.error(f"Missing required columns in {path}: {missing}")
+                    raise ValueError("Invalid Excel data structure")
+                header_checked = True
+            
+            # Skip blank rows; they still count towards row_index, as they do in the pandas index
+            if all(value is None for value in record.values()):
+                continue
+            
+            chunk.append((row_index, record) if with_index else record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        
+        if chunk:
+            yield chunk
+    
+    def _iter_xlsx_rows(self, path: str, sheet_name: str) -> Iterator[Dict]:
+        """Yield sheet rows as dicts using openpyxl's read-only streaming mode"""
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook[sheet_name].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [str(col) if col is not None else f"column_{i}" for i, col in enumerate(header)]
+            for values in rows:
+                yield dict(zip(columns, values))
+        finally:
+            workbook.close()
+    
+    def _iter_csv_rows(self, path: str) -> Iterator[Dict]:
+        """Yield CSV rows as dicts, treating empty cells as missing"""
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                yield {col: (value if value != '' else None) for col, value in row.items()}
+    
+    def _iter_parquet_rows(self, path: str, batch_size: int) -> Iterator[Dict]:
+        """Yield Parquet rows as dicts, one record batch at a time"""
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet input requires pyarrow: pip install pyarrow")
+        
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+    
+    def get_music_rows(self, path: str = None) -> List[Dict]:
+        """Load the (small) music sheet once through the streaming reader"""
+        if self._music_rows is None or path:
+            music_rows = []
+            for chunk in self.iter_records(path, Config.MUSIC_SHEET, self.REQUIRED_MUSIC_COLUMNS):
+                music_rows.extend(chunk)
+            if not music_rows:
+                raise ValueError("Music sheet is empty")
+            self._music_rows = music_rows
+        return self._music_rows
+    
+    def iter_video_data_chunks(self, chunk_size: int = None, quotes_path: str = None,
+                               music_path: str = None) -> Iterator[List[Dict]]:
+        """Stream video data in chunks without loading the whole quotes sheet"""
+        music_index = MusicIndex(self.get_music_rows(music_path))
+        
+        for chunk in self.iter_records(quotes_path, Config.QUOTES_SHEET, self.REQUIRED_QUOTE_COLUMNS, chunk_size,
+                                       with_index=True):
+            video_chunk = []
+            for row_index, quote_data in chunk:
+                video_chunk.append({
+                    'row_index': row_index,
+                    'quote': quote_data,
+                    'music': music_index.select(quote_data.get('genre'))
+                })
+            yield video_chunk
@@ -0,0 +1,183 @@
+import re
+import itertools
+import subprocess
+import threading
+from config.settings import Config
+
+
+def get_ffmpeg_binary() -> str:
+    """Return the FFmpeg binary MoviePy is configured to use"""
+    from moviepy.config import get_setting
+    return get_setting("FFMPEG_BINARY")
+
+
+def get_encode_profile(name: str = None) -> dict:
+    """Look up a named encode profile from the configuration"""
+    name = name or Config.DEFAULT_ENCODE_PROFILE
+    if name not in Config.ENCODE_PROFILES:
+        raise ValueError(f"Unknown encode profile '{name}'. Available: {list(Config.ENCODE_PROFILES)}")
+    return dict(Config.ENCODE_PROFILES[name], name=name)
+
+
+def x264_params(profile: dict, fps: int) -> list:
+    """Encoder options of a profile other than codec and preset, as FFmpeg arguments"""
+    params = ['-crf', str(profile['crf']), '-g', str(int(fps * profile['gop_seconds']))]
+    if profile.get('tune'):
+        params += ['-tune', profile['tune']]
+    params += ['-pix_fmt', profile['pix_fmt']]
+    return params
+
+
+def frame_buffer(frame) -> memoryview:
+    """Flat byte view of a frame for writing to FFmpeg without copying it"""
+    if not frame.flags['C_CONTIGUOUS']:
+        frame = frame.copy()
+    return memoryview(frame).cast('B')
+
+
+def encode_still_frame(frame, output_path: str, duration: float, fps: int, audio_path: str = None,
+                       profile: dict = None, output_stream=None) -> str:
+    """Encode a single RGB frame as a still-image video stream, to a file or a writable binary stream"""
+    return encode_frames([frame], output_path, duration, fps, audio_path, profile, output_stream)
+
+
+def encode_frames(frames, output_path: str, duration: float, fps: int, audio_path: str = None,
+                  profile: dict = None, output_stream=None) -> str:
+    """Encode a sequence of RGB frames whose last frame holds until duration, to a file or a binary stream"""
+    frames = iter(frames)
+    first = next(frames)
+    height, width = first.shape[:2]
+    profile = profile or get_encode_profile()
+
+    cmd = [
+        get_ffmpeg_binary(), '-y', '-loglevel', 'error',
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}',
+        '-r', str(fps), '-i', '-'
+    ]
+    if audio_path:
+        cmd += ['-i', audio_path]
+
+    # Only changing frames are sent; FFmpeg clones the last one for the rest of the duration
+    cmd += [
+        '-vf', 'tpad=stop_mode=clone:stop=-1',
+        '-c:v', 'libx264', '-preset', profile['preset'], '-threads', str(profile['threads'])
+    ]
+    cmd += x264_params(profile, fps)
+    if audio_path:
+        cmd += ['-map', '0:v:0', '-map', '1:a:0', '-c:a', 'copy']
+    cmd += ['-t', str(duration)]
+
+    buffers = (frame_buffer(frame) for frame in itertools.chain([first], frames))
+    if output_stream is not None:
+        # Fragmented MP4 needs no seek back to write the index, so it can go through a pipe
+        cmd += ['-movflags', 'frag_keyframe+empty_moov+default_base_moof', '-f', 'mp4', 'pipe:1']
+        return _encode_to_stream(cmd, buffers, output_stream)
+
+    proc = subprocess.Popen(cmd + [output_path], stdin=subprocess.PIPE,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    # Drain stderr alongside so a chatty FFmpeg cannot block on a full pipe
+    errors = []
+    reader = threading.Thread(target=lambda: errors.append(proc.stderr.read()), daemon=True)
+    reader.start()
+    try:
+        _feed(proc, buffers)
+    except BaseException:
+        proc.kill()
+        raise
+    finally:
+        reader.join()
+        proc.wait()
+    if proc.returncode != 0:
+        raise IOError(f"FFmpeg failed to encode {output_path}: {b''.join(errors).decode(errors='replace')}")
+    return output_path
+
+
+def _feed(proc, buffers):
+    """Write frame buffers to FFmpeg's stdin and close it"""
+    try:
+        for data in buffers:
+            proc.stdin.write(data)
+    except BrokenPipeError:
+        pass  # FFmpeg exited early; its stderr explains why
+    finally:
+        proc.stdin.close()
+
+
+def _encode_to_stream(cmd: list, buffers, output_stream, chunk_size: int = 1024 * 1024):
+    """Run FFmpeg feeding stdin from a thread while copying its stdout to output_stream"""
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    failure = []
+
+    def feed():
+        try:
+            _feed(proc, buffers)
+        except BaseException as e:
+            # Producing a frame failed; stop FFmpeg so the reader sees the end of output
+            failure.append(e)
+            proc.kill()
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    try:
+        while True:
+            chunk = proc.stdout.read(chunk_size)
+            if not chunk:
+                break
+            output_stream.write(chunk)
+    except BaseException:
+        # The reader went away; stop FFmpeg so the feeding thread is not left blocked
+        proc.kill()
+        raise
+    finally:
+        writer.join()
+        stderr = proc.stderr.read()
+        proc.wait()
+    if failure:
+        raise failure[0]
+    if proc.returncode != 0:
+        raise IOError(f"FFmpeg failed to encode to stream: {stderr.decode(errors='replace')}")
+    return None
+
+
+def encode_music_bed(music_file: str, output_path: str, duration: float, volume: float) -> str:
+    """Loop or trim a track to duration, attenuate it and encode it to AAC"""
+    cmd = [
+        get_ffmpeg_binary(), '-y', '-loglevel', 'error',
+        '-stream_loop', '-1', '-i', music_file,
+        '-t', str(duration), '-vn',
+        '-af', f'volume={volume}',
+        '-ar', '44100', '-ac', '2', '-c:a', 'aac',
+        output_path
+    ]
+
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise IOError(f"FFmpeg failed to encode music bed {output_path}: {proc.stderr.decode(errors='replace')}")
+    return output_path
+
+
+def probe_audio(path: str) -> dict:
+    """Decode a track once to measure its duration, sample rate and integrated loudness (LUFS)"""
+    cmd = [
+        get_ffmpeg_binary(), '-hide_banner', '-nostats', '-i', path,
+        '-vn', '-af', 'ebur128=framelog=quiet', '-f', 'null', '-'
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    log = proc.stderr.decode(errors='replace')
+    if proc.returncode != 0:
+        raise IOError(f"FFmpeg failed to probe {path}: {log}")
+
+    # The header describes the input; the summary after decoding has the measured values
+    header = log.split('Output #0', 1)[0]
+    sample_rate = re.search(r'Audio: .*?(\d+) Hz', header)
+    loudness = re.search(r'I:\s+(-?[\d.]+|-inf) LUFS', log)
+    times = re.findall(r'time=(\d+):(\d+):([\d.]+)', log) or re.findall(r'Duration: (\d+):(\d+):([\d.]+)', header)
+    duration = None
+    if times:
+        hours, minutes, seconds = times[-1]
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    return {
+        'duration': duration,
+        'sample_rate': int(sample_rate.group(1)) if sample_rate else None,
+        'loudness': float(loudness.group(1)) if loudness and loudness.group(1) != '-inf' else None
+    }
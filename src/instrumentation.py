@@ -0,0 +1,256 @@
+import os
+import json
+import time
+import uuid
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from config.settings import Config
+import logging
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+DURATION_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+_file_handlers = {}
+_handlers_lock = threading.Lock()
+
+
+def get_logger(name: str, log_file: str) -> logging.Logger:
+    """Logger that writes to LOGS_DIR/log_file; one handler per file, shared by every logger using it"""
+    path = os.path.abspath(os.path.join(Config.LOGS_DIR, log_file))
+    logger = logging.getLogger(name)
+    with _handlers_lock:
+        handler = _file_handlers.get(path)
+        if handler is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = logging.FileHandler(path)
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            _file_handlers[path] = handler
+        if handler not in logger.handlers:
+            logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ''
+    body = ','.join('{}="{}"'.format(name, value.replace('\\', '\\\\').replace('"', '\\"')) for name, value in pairs)
+    return '{' + body + '}'
+
+
+class Metrics:
+    """Counters, gauges and duration histograms with Prometheus text export and JSON-lines span traces"""
+
+    HELP = {
+        'stage_duration_seconds': 'Time spent in each pipeline stage',
+        'stage_total': 'Finished stage runs by status',
+        'stage_last_success_timestamp_seconds': 'Unix time of the last successful run of each stage',
+        'bytes_written_total': 'Bytes of video written by encodes',
+        'bytes_uploaded_total': 'Bytes of video uploaded',
+        'render_cache_hits_total': 'Renders served from the render cache',
+        'upload_retries_total': 'Upload chunks retried after a transient error',
+        'pipeline_queue_depth': 'Rendered videos waiting for an upload worker',
+        'scheduler_pending_jobs': 'Jobs waiting in the event scheduler',
+        'scheduler_dispatch_delay_seconds': 'How late scheduled jobs were dispatched',
+        'jobs_total': 'Videos processed by the scheduler by outcome',
+    }
+
+    def __init__(self, trace_file: str = None, metrics_file: str = None):
+        self.trace_file = trace_file if trace_file is not None else Config.TRACE_FILE
+        self.metrics_file = metrics_file if metrics_file is not None else Config.METRICS_FILE
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self._trace_lock = threading.Lock()
+        self._last_flush = 0.0
+        self._server = None
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self.lock:
+            self.gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            histogram = self.histograms.setdefault(
+                key, {'buckets': [0] * len(DURATION_BUCKETS), 'count': 0, 'sum': 0.0}
+            )
+            for position, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    histogram['buckets'][position] += 1
+            histogram['count'] += 1
+            histogram['sum'] += value
+
+    @contextmanager
+    def span(self, stage: str, **attributes):
+        """Time a stage; the yielded dict collects attributes such as bytes for the trace"""
+        record = dict(attributes)
+        started_at = time.time()
+        started = time.perf_counter()
+        status = 'ok'
+        try:
+            yield record
+        except BaseException as e:
+            status = 'error'
+            record['error'] = str(e)
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            self.observe('stage_duration_seconds', duration, stage=stage)
+            self.inc('stage_total', stage=stage, status=status)
+            if status == 'ok':
+                self.set_gauge('stage_last_success_timestamp_seconds', time.time(), stage=stage)
+            self.trace({
+                'stage': stage,
+                'start': datetime.fromtimestamp(started_at, tz=timezone.utc).isoformat(),
+                'duration_seconds': round(duration, 6),
+                'status': status,
+                'pid': os.getpid(),
+                **record
+            })
+            self.maybe_flush()
+
+    def trace(self, event: dict):
+        """Append one JSON line to the trace file"""
+        if not self.trace_file:
+            return
+        line = json.dumps(event, default=str) + '\n'
+        with self._trace_lock:
+            # One write per line in append mode keeps lines intact across worker processes
+            with open(self.trace_file, 'a') as f:
+                f.write(line)
+
+    def snapshot(self, reset: bool = False) -> dict:
+        """Copy of all values, e.g. to hand from a worker process back to its parent"""
+        with self.lock:
+            data = {
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'histograms': {key: {'buckets': list(h['buckets']), 'count': h['count'], 'sum': h['sum']}
+                               for key, h in self.histograms.items()}
+            }
+            if reset:
+                self.counters.clear()
+                self.histograms.clear()
+        return data
+
+    def merge(self, data: dict):
+        """Add a snapshot taken in another process"""
+        if not data:
+            return
+        with self.lock:
+            for key, value in data['counters'].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            self.gauges.update(data['gauges'])
+            for key, other in data['histograms'].items():
+                histogram = self.histograms.setdefault(
+                    key, {'buckets': [0] * len(DURATION_BUCKETS), 'count': 0, 'sum': 0.0}
+                )
+                histogram['buckets'] = [a + b for a, b in zip(histogram['buckets'], other['buckets'])]
+                histogram['count'] += other['count']
+                histogram['sum'] += other['sum']
+
+    def render_prometheus(self) -> str:
+        """Current values in the Prometheus text exposition format"""
+        data = self.snapshot()
+        families = {}
+        for kind in ('counters', 'gauges', 'histograms'):
+            for (name, labels), value in data[kind].items():
+                families.setdefault(name, (kind, []))[1].append((labels, value))
+
+        types = {'counters': 'counter', 'gauges': 'gauge', 'histograms': 'histogram'}
+        lines = []
+        for name in sorted(families):
+            kind, samples = families[name]
+            if name in self.HELP:
+                lines.append(f"# HELP {name} {self.HELP[name]}")
+            lines.append(f"# TYPE {name} {types[kind]}")
+            for labels, value in sorted(samples):
+                if kind != 'histograms':
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+                    continue
+                for bound, count in zip(DURATION_BUCKETS, value['buckets']):
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', str(bound)),))} {count}")
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {value['count']}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {value['sum']}")
+                lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str = None):
+        """Write the text format atomically, for node_exporter's textfile collector or a scraper"""
+        path = path or self.metrics_file
+        if not path:
+            return
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(self.render_prometheus())
+        os.replace(temp_path, path)
+
+    def maybe_flush(self):
+        """Rewrite the metrics file at most once per METRICS_FLUSH_SECONDS"""
+        now = time.monotonic()
+        if now - self._last_flush < Config.METRICS_FLUSH_SECONDS:
+            return
+        self._last_flush = now
+        try:
+            self.write_prometheus()
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Could not write metrics file: {str(e)}")
+
+    def serve(self, port: int = None, host: str = '0.0.0.0'):
+        """Expose /metrics over HTTP from a background thread"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        if self._server is not None:
+            return self._server
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                payload = metrics.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self._server = ThreadingHTTPServer((host, port or Config.METRICS_PORT), Handler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        return self._server
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """Process-wide metrics registry"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+            # Worker processes report back to their parent instead of serving their own endpoint
+            if Config.METRICS_PORT and multiprocessing.parent_process() is None:
+                try:
+                    _metrics.serve()
+                except OSError as e:
+                    logging.getLogger(__name__).warning(f"Metrics endpoint not started: {str(e)}")
+        return _metrics
@@ -0,0 +1,223 @@
+import os
+import time
+import socket
+import sqlite3
+from contextlib import closing
+from typing import Dict, List
+from src.instrumentation import get_logger
+from config.settings import Config
+
+PENDING = 'pending'
+RENDERED = 'rendered'
+UPLOADED = 'uploaded'
+SCHEDULED = 'scheduled'
+FAILED = 'failed'
+
+# States a worker may pick up; uploaded and scheduled rows are finished
+CLAIMABLE_STATES = (PENDING, RENDERED)
+
+
+class JobStore:
+    """SQLite-backed record of every row's progress, shared by the scheduler processes on one host
+
+    The database uses WAL mode, which relies on shared memory, so it must stay on a local disk and
+    is not safe to share between hosts over a network filesystem. Render across hosts with a
+    render broker (src/render_broker.py) instead.
+    """
+
+    def __init__(self, db_path: str = None, worker_id: str = None):
+        self.db_path = db_path or Config.JOB_STORE_PATH
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.setup_logging()
+        self._create_schema()
+
+    def setup_logging(self):
+        self.logger = get_logger(__name__, 'scheduler.log')
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; claims open their own IMMEDIATE transaction
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _create_schema(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            # Readers never block the writer; WAL needs a local disk (see the class docstring)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    row_index INTEGER PRIMARY KEY,
+                    state TEXT NOT NULL DEFAULT 'pending',
+                    output_path TEXT,
+                    video_id TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    claimed_by TEXT,
+                    claimed_at REAL,
+                    updated_at REAL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, row_index)')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS timings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    row_index INTEGER,
+                    stage TEXT NOT NULL,
+                    seconds REAL NOT NULL,
+                    recorded_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS timings_stage ON timings (stage, id)')
+
+    def enqueue_rows(self, row_indices) -> int:
+        """Add rows as pending jobs, leaving rows that are already known untouched"""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cursor = conn.executemany(
+                'INSERT OR IGNORE INTO jobs (row_index, state, updated_at) VALUES (?, ?, ?)',
+                [(row_index, PENDING, now) for row_index in row_indices]
+            )
+            return cursor.rowcount
+
+    def claim_next(self) -> Dict:
+        """Atomically claim the lowest pending or rendered row; returns None if there is none"""
+        # Failed rows with attempts left rejoin the queue first
+        self.retry_failed()
+        return self._claim(
+            f'''SELECT * FROM jobs
+                WHERE state IN ({','.join('?' * len(CLAIMABLE_STATES))})
+                AND (claimed_by IS NULL OR claimed_at < ?)
+                ORDER BY row_index LIMIT 1''',
+            (*CLAIMABLE_STATES, time.time() - Config.JOB_LEASE_SECONDS)
+        )
+
+    def claim_row(self, row_index: int, force: bool = False) -> Dict:
+        """Claim one specific row, adding it if needed; returns None if it is finished or another
+        worker holds it. force also claims finished and failed rows, for an explicit re-process"""
+        self.enqueue_rows([row_index])
+        states = () if force else CLAIMABLE_STATES
+        state_filter = f"AND state IN ({','.join('?' * len(states))})" if states else ''
+        return self._claim(
+            f'''SELECT * FROM jobs WHERE row_index = ? {state_filter}
+                AND (claimed_by IS NULL OR claimed_at < ?)''',
+            (row_index, *states, time.time() - Config.JOB_LEASE_SECONDS)
+        )
+
+    def _claim(self, query: str, params: tuple) -> Dict:
+        conn = self._connect()
+        try:
+            # IMMEDIATE takes the write lock up front so two workers cannot claim the same row
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(query, params).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            now = time.time()
+            conn.execute(
+                'UPDATE jobs SET claimed_by = ?, claimed_at = ?, attempts = attempts + 1, updated_at = ? '
+                'WHERE row_index = ?',
+                (self.worker_id, now, now, row['row_index'])
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+        job = dict(row, claimed_by=self.worker_id, claimed_at=now, attempts=row['attempts'] + 1)
+        self.logger.info(f"Claimed job {job['row_index']} ({job['state']}) as {self.worker_id}")
+        return job
+
+    def _update(self, row_index: int, release: bool, **fields) -> bool:
+        """Update a row this worker holds; False (and nothing changes) if its claim was taken over"""
+        fields['updated_at'] = time.time()
+        if release:
+            fields['claimed_by'] = None
+            fields['claimed_at'] = None
+        else:
+            # Progress renews the lease
+            fields['claimed_at'] = fields['updated_at']
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                f'UPDATE jobs SET {assignments} WHERE row_index = ? AND claimed_by = ?',
+                (*fields.values(), row_index, self.worker_id)
+            )
+        if not cursor.rowcount:
+            self.logger.warning(f"Job {row_index} is no longer claimed by {self.worker_id}; update ignored")
+        return bool(cursor.rowcount)
+
+    def mark_rendered(self, row_index: int, output_path: str) -> bool:
+        return self._update(row_index, False, state=RENDERED, output_path=output_path, error=None)
+
+    def mark_uploaded(self, row_index: int, video_id: str) -> bool:
+        return self._update(row_index, True, state=UPLOADED, video_id=video_id, error=None)
+
+    def mark_scheduled(self, row_index: int, video_id: str) -> bool:
+        return self._update(row_index, True, state=SCHEDULED, video_id=video_id, error=None)
+
+    def mark_failed(self, row_index: int, error: str, output_path: str = None) -> bool:
+        """Record a failure; with the render's output_path a retry only has to upload it"""
+        if output_path:
+            return self._update(row_index, True, state=FAILED, error=error, output_path=output_path)
+        return self._update(row_index, True, state=FAILED, error=error)
+
+    def release(self, row_index: int) -> bool:
+        """Give up a claim without changing the row's state"""
+        return self._update(row_index, True)
+
+    def retry_failed(self, max_attempts: int = None) -> int:
+        """Requeue failed rows claimed fewer than max_attempts times; rows with a render go back
+        as rendered, so a failed upload is retried without rendering again"""
+        max_attempts = max_attempts or Config.JOB_MAX_ATTEMPTS
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                'UPDATE jobs SET state = CASE WHEN output_path IS NULL THEN ? ELSE ? END, updated_at = ? '
+                'WHERE state = ? AND attempts < ?',
+                (PENDING, RENDERED, time.time(), FAILED, max_attempts)
+            )
+        if cursor.rowcount:
+            self.logger.info(f"Requeued {cursor.rowcount} failed jobs")
+        return cursor.rowcount
+
+    def get_job(self, row_index: int) -> Dict:
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE row_index = ?', (row_index,)).fetchone()
+        return dict(row) if row else None
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each state"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute('SELECT state, COUNT(*) AS n FROM jobs GROUP BY state').fetchall()
+        return {row['state']: row['n'] for row in rows}
+
+    def list_jobs(self, state: str = None) -> List[Dict]:
+        with closing(self._connect()) as conn:
+            if state:
+                rows = conn.execute('SELECT * FROM jobs WHERE state = ? ORDER BY row_index', (state,)).fetchall()
+            else:
+                rows = conn.execute('SELECT * FROM jobs ORDER BY row_index').fetchall()
+        return [dict(row) for row in rows]
+
+    def record_timing(self, stage: str, seconds: float, row_index: int = None):
+        """Store how long one stage took for a row"""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                'INSERT INTO timings (row_index, stage, seconds, recorded_at) VALUES (?, ?, ?, ?)',
+                (row_index, stage, seconds, time.time())
+            )
+
+    def average_timing(self, stage: str, window: int = 50) -> float:
+        """Mean duration of the most recent runs of a stage, or None without history"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                'SELECT AVG(seconds) AS avg, COUNT(*) AS n FROM '
+                '(SELECT seconds FROM timings WHERE stage = ? ORDER BY id DESC LIMIT ?)',
+                (stage, window)
+            ).fetchone()
+        return row['avg'] if row['n'] else None
@@ -0,0 +1,145 @@
+import os
+import json
+import math
+import random
+import uuid
+from collections import deque
+from typing import Dict, List
+from src.ffmpeg_encoder import probe_audio
+from src.instrumentation import get_logger, get_metrics
+from config.settings import Config
+
+INDEX_VERSION = 1
+
+
+def normalize_genre(value) -> str:
+    """Lower-cased genre name, or '' for an empty cell"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    return str(value).strip().lower()
+
+
+def sheet_duration(value):
+    """Duration column value in seconds, or None if empty or not a number"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+class MusicIndex:
+    """Music sheet rows joined with probed audio facts, for rule-based track selection"""
+
+    def __init__(self, rows: List[Dict], index_path: str = None):
+        self.setup_logging()
+        self.metrics = get_metrics()
+        self.index_path = index_path or os.path.join(Config.CACHE_DIR, 'music_index.json')
+        self.recent = deque(maxlen=max(Config.MUSIC_NO_REPEAT_WINDOW, 0))
+        self.tracks = self._build(rows)
+        self._pools = {}
+
+    def setup_logging(self):
+        self.logger = get_logger(__name__, 'music_index.log')
+
+    def _build(self, rows: List[Dict]) -> List[Dict]:
+        """Join each row with its probe results, probing only new or changed files"""
+        cached = self._read_index()
+        probed = 0
+        tracks = []
+        for row in rows:
+            music_file = row.get('music_file')
+            available = isinstance(music_file, str) and os.path.isfile(music_file)
+            info = {}
+            if available:
+                path = os.path.abspath(music_file)
+                stat = os.stat(path)
+                info = cached.get(path)
+                if not info or info['mtime_ns'] != stat.st_mtime_ns or info['size'] != stat.st_size:
+                    info = self._probe(path, stat)
+                    cached[path] = info
+                    probed += 1
+
+            duration = info.get('duration')
+            tracks.append({
+                'row': row,
+                'key': os.path.abspath(music_file) if available else music_file,
+                'available': available,
+                'genre': normalize_genre(row.get('genre')),
+                # The sheet's duration column is only trusted for files that could not be probed
+                'duration': duration if duration is not None else sheet_duration(row.get('duration')),
+                'sample_rate': info.get('sample_rate'),
+                'loudness': info.get('loudness')
+            })
+
+        if probed:
+            self._write_index(cached)
+        self.logger.info(f"Music index ready: {len(tracks)} tracks, {probed} probed")
+        return tracks
+
+    def _probe(self, path: str, stat: os.stat_result) -> Dict:
+        """Probe one file; failures are recorded too so a broken file is not decoded on every run"""
+        self.metrics.inc('music_probes_total')
+        info = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+        try:
+            info.update(probe_audio(path))
+        except Exception as e:
+            self.logger.warning(f"Could not probe {path}: {str(e)}")
+            info['error'] = str(e).splitlines()[0]
+        return info
+
+    def _read_index(self) -> Dict:
+        """Persisted probe results keyed by absolute path, ignoring a missing or unreadable file"""
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+            return data['files'] if data.get('version') == INDEX_VERSION else {}
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable music index {self.index_path}: {str(e)}")
+            return {}
+
+    def _write_index(self, files: Dict):
+        """Atomically replace the persisted probe results"""
+        os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+        tmp_path = f"{self.index_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'files': files}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def _pool(self, genre: str, min_duration: float) -> List[Dict]:
+        """Tracks passing the fixed rules, computed once per genre and length"""
+        key = (genre, min_duration)
+        if key not in self._pools:
+            pool = self.tracks
+            # Each rule narrows the pool only while some track still satisfies it
+            for rule in (
+                lambda track: track['available'],
+                lambda track: not genre or track['genre'] == genre,
+                lambda track: track['duration'] is not None and track['duration'] >= min_duration
+            ):
+                narrowed = [track for track in pool if rule(track)]
+                if narrowed:
+                    pool = narrowed
+            self._pools[key] = pool
+        return self._pools[key]
+
+    def select(self, genre=None, min_duration: float = None) -> Dict:
+        """Pick a track: existing file, matching genre, at least min_duration long, not recently used"""
+        if not self.tracks:
+            raise ValueError("Music sheet is empty")
+        genre = normalize_genre(genre) or normalize_genre(Config.DEFAULT_MUSIC_GENRE)
+        min_duration = Config.VIDEO_DURATION if min_duration is None else min_duration
+
+        pool = self._pool(genre, min_duration)
+        fresh = [track for track in pool if track['key'] not in self.recent]
+        track = random.choice(fresh or pool)
+        self.recent.append(track['key'])
+
+        return dict(
+            track['row'],
+            track_duration=track['duration'],
+            sample_rate=track['sample_rate'],
+            loudness=track['loudness']
+        )
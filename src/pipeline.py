@@ -0,0 +1,126 @@
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from src.video_generator import render_video_job
+from src.upload_service import get_upload_service
+from src.job_store import JobStore
+from src.youtube_uploader import future_publish_time
+from src.instrumentation import get_logger, get_metrics
+from config.settings import Config
+
+_STOP = object()
+
+
+class VideoPipeline:
+    """Render and upload stages connected by a bounded queue; publish times are set by the upload itself.
+    Rows are claimed in the job store, so finished rows and rows held by a worker are skipped"""
+
+    def __init__(self, excel_processor, render_workers: int = None, upload_workers: int = None,
+                 max_pending: int = None, upload_service=None, job_store=None):
+        self.excel_processor = excel_processor
+        self.job_store = job_store or JobStore()
+        self.render_workers = render_workers or Config.PIPELINE_RENDER_WORKERS
+        self.upload_workers = upload_workers or Config.PIPELINE_UPLOAD_WORKERS
+        self.max_pending = max_pending or Config.PIPELINE_MAX_PENDING
+        self.upload_service = upload_service or get_upload_service()
+        self.metrics = get_metrics()
+        self.setup_logging()
+
+    def setup_logging(self):
+        self.logger = get_logger(__name__, 'pipeline.log')
+
+    def run(self, row_indices: list) -> list:
+        """Push rows through the pipeline and return one result per row, in row order"""
+        # Every slot is one MP4 that is being rendered or waiting for upload
+        slots = threading.BoundedSemaphore(self.max_pending)
+        upload_queue = queue.Queue(maxsize=self.max_pending)
+        # Rows that failed on an earlier run are retried while they have attempts left
+        self.job_store.retry_failed()
+        results = {row_index: {'row': row_index, 'video_id': None, 'error': None, 'skipped': False}
+                   for row_index in row_indices}
+
+        upload_threads = [
+            threading.Thread(target=self._upload_stage, args=(upload_queue, slots, results),
+                             name=f'pipeline-upload-{i}', daemon=True)
+            for i in range(self.upload_workers)
+        ]
+        for thread in upload_threads:
+            thread.start()
+
+        self.logger.info(
+            f"Pipeline started: {len(row_indices)} rows, {self.render_workers} render / "
+            f"{self.upload_workers} upload workers, max {self.max_pending} pending videos"
+        )
+
+        with ProcessPoolExecutor(max_workers=self.render_workers) as executor:
+            for row_index in row_indices:
+                if self.job_store.claim_row(row_index) is None:
+                    job = self.job_store.get_job(row_index)
+                    self.logger.info(f"Skipping row {row_index}: {job['state']}, claimed by {job['claimed_by']}")
+                    results[row_index].update(skipped=True, video_id=job['video_id'])
+                    continue
+
+                slots.acquire()
+                try:
+                    video_data = self.excel_processor.get_video_data(row_index)
+                except Exception as e:
+                    self.logger.error(f"Error loading row {row_index}: {str(e)}")
+                    results[row_index]['error'] = str(e)
+                    self.job_store.mark_failed(row_index, str(e))
+                    slots.release()
+                    continue
+
+                output_path = os.path.join(Config.TEMP_DIR, f"pipeline_{os.getpid()}_{row_index:05d}.mp4")
+                future = executor.submit(render_video_job, (video_data, output_path, None))
+                future.add_done_callback(
+                    lambda f, row_index=row_index, video_data=video_data:
+                        self._enqueue_upload(upload_queue, (row_index, video_data, f))
+                )
+
+        for _ in upload_threads:
+            upload_queue.put(_STOP)
+        for thread in upload_threads:
+            thread.join()
+
+        failed = sum(1 for result in results.values() if result['error'])
+        skipped = sum(1 for result in results.values() if result['skipped'])
+        self.logger.info(
+            f"Pipeline finished: {len(row_indices) - failed - skipped} succeeded, {failed} failed, {skipped} skipped"
+        )
+        self.metrics.write_prometheus()
+        return [results[row_index] for row_index in row_indices]
+
+    def _enqueue_upload(self, upload_queue, item):
+        upload_queue.put(item)
+        self.metrics.set_gauge('pipeline_queue_depth', upload_queue.qsize())
+
+    def _upload_stage(self, upload_queue, slots, results):
+        """Upload rendered videos, scheduling them in the same API call"""
+        while True:
+            item = upload_queue.get()
+            self.metrics.set_gauge('pipeline_queue_depth', upload_queue.qsize())
+            if item is _STOP:
+                break
+
+            row_index, video_data, future = item
+            video_path = None
+            try:
+                video_path, worker_metrics = future.result()
+                self.metrics.merge(worker_metrics)
+                if not self.job_store.mark_rendered(row_index, video_path):
+                    raise RuntimeError("claim was taken over by another worker before the upload")
+                video_id = self.upload_service.upload_video(video_path, video_data)
+                results[row_index]['video_id'] = video_id
+                if future_publish_time(video_data['quote'].get('scheduled_time')):
+                    self.job_store.mark_scheduled(row_index, video_id)
+                else:
+                    self.job_store.mark_uploaded(row_index, video_id)
+            except Exception as e:
+                self.logger.error(f"Error processing row {row_index}: {str(e)}")
+                results[row_index]['error'] = str(e)
+                self.job_store.mark_failed(row_index, str(e))
+            finally:
+                if video_path and os.path.exists(video_path):
+                    os.remove(video_path)
+                slots.release()
@@ -0,0 +1,444 @@
+import os
+import json
+import time
+import uuid
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Dict, Optional
+from src.instrumentation import get_logger
+from config.settings import Config
+
+PENDING = 'pending'
+CLAIMED = 'claimed'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def new_job_id() -> str:
+    """Job ID that sorts by submission time"""
+    return f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+
+
+def get_broker(url: str = None) -> 'Broker':
+    """Broker for a URL: 'redis://...', 'memory://', or a (shared) directory path, optionally 'file://...'"""
+    url = url or Config.RENDER_BROKER_URL
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBroker(url)
+    if url == 'memory://':
+        return LocalBroker()
+    if url.startswith('file://'):
+        url = url[len('file://'):]
+    return DirectoryBroker(url)
+
+
+class Broker(ABC):
+    """Render job queue with at-least-once delivery
+
+    A claimed job stays invisible to other workers while its claim is renewed with heartbeat();
+    once a claim is older than the visibility timeout, requeue_expired() hands it out again, or
+    marks it failed after max_attempts claims. Every claim carries its own token, so heartbeats and
+    outcomes from a worker whose claim expired are ignored rather than applied to the new claim.
+    """
+
+    def __init__(self, visibility_timeout: float = None, max_attempts: int = None):
+        self.visibility_timeout = visibility_timeout or Config.RENDER_VISIBILITY_TIMEOUT
+        self.max_attempts = max_attempts or Config.JOB_MAX_ATTEMPTS
+        self.logger = get_logger(__name__, 'render_worker.log')
+
+    @abstractmethod
+    def submit(self, job: Dict) -> str:
+        """Queue a job and return its ID"""
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """Take the oldest pending job, or None if the queue is empty"""
+
+    @abstractmethod
+    def heartbeat(self, job: Dict) -> bool:
+        """Renew a claim; False if it expired and the job was requeued or finished meanwhile"""
+
+    @abstractmethod
+    def ack(self, job: Dict, result: Dict):
+        """Record a finished job and its result; ignored if the claim expired meanwhile"""
+
+    @abstractmethod
+    def fail(self, job: Dict, error: str):
+        """Give a claimed job back for another attempt, or mark it failed once attempts run out;
+        ignored if the claim expired meanwhile"""
+
+    @abstractmethod
+    def requeue_expired(self) -> int:
+        """Release claims whose worker stopped sending heartbeats; returns how many were released"""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each state"""
+
+    def _prepare(self, job: Dict) -> Dict:
+        job = dict(job)
+        job.setdefault('id', new_job_id())
+        job.setdefault('attempts', 0)
+        job['submitted_at'] = time.time()
+        return job
+
+    def _claimed(self, job: Dict, worker_id: str, claim: str = None) -> Dict:
+        job['attempts'] += 1
+        job['claimed_by'] = worker_id
+        job['claimed_at'] = time.time()
+        job['claim'] = claim or uuid.uuid4().hex
+        self.logger.info(f"Job {job['id']} (attempt {job['attempts']}) claimed by {worker_id}")
+        return job
+
+    def _owns(self, current: Optional[Dict], job: Dict) -> bool:
+        """Whether the broker's copy of a job still carries the claim the worker holds"""
+        return current is not None and current.get('claim') == job.get('claim')
+
+    def _stale(self, job: Dict, action: str):
+        self.logger.warning(f"Ignoring {action} of job {job['id']} from {job.get('claimed_by')}: its claim expired")
+
+    def _retry(self, job: Dict) -> bool:
+        retry = job['attempts'] < self.max_attempts
+        if not retry:
+            self.logger.error(f"Job {job['id']} failed after {job['attempts']} attempts: {job.get('error')}")
+        return retry
+
+
+class LocalBroker(Broker):
+    """In-process broker for a single machine and for tests; jobs are lost when the process exits"""
+
+    def __init__(self, visibility_timeout: float = None, max_attempts: int = None):
+        super().__init__(visibility_timeout, max_attempts)
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._in_flight = {}
+        self._done = {}
+        self._failed = {}
+
+    def submit(self, job: Dict) -> str:
+        job = self._prepare(job)
+        with self._lock:
+            self._pending.append(job)
+        return job['id']
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        with self._lock:
+            if not self._pending:
+                return None
+            job = self._claimed(self._pending.popleft(), worker_id)
+            self._in_flight[job['id']] = (job, time.monotonic() + self.visibility_timeout)
+        return dict(job)
+
+    def _in_flight_job(self, job: Dict) -> Optional[Dict]:
+        current, _ = self._in_flight.get(job['id'], (None, None))
+        return current
+
+    def heartbeat(self, job: Dict) -> bool:
+        with self._lock:
+            current = self._in_flight_job(job)
+            if not self._owns(current, job):
+                return False
+            self._in_flight[job['id']] = (current, time.monotonic() + self.visibility_timeout)
+            return True
+
+    def ack(self, job: Dict, result: Dict):
+        with self._lock:
+            if not self._owns(self._in_flight_job(job), job):
+                self._stale(job, 'result')
+                return
+            del self._in_flight[job['id']]
+            self._done[job['id']] = dict(job, result=result)
+
+    def fail(self, job: Dict, error: str):
+        with self._lock:
+            if not self._owns(self._in_flight_job(job), job):
+                self._stale(job, 'failure')
+                return
+            del self._in_flight[job['id']]
+            self._release(dict(job, error=error))
+
+    def _release(self, job: Dict):
+        if self._retry(job):
+            self._pending.append(job)
+        else:
+            self._failed[job['id']] = job
+
+    def requeue_expired(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            expired = [job for job, deadline in self._in_flight.values() if deadline < now]
+            for job in expired:
+                del self._in_flight[job['id']]
+                self._release(dict(job, error='visibility timeout expired'))
+        return len(expired)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {PENDING: len(self._pending), CLAIMED: len(self._in_flight),
+                    DONE: len(self._done), FAILED: len(self._failed)}
+
+
+class DirectoryBroker(Broker):
+    """Queue of JSON files in a directory shared between hosts (NFS, SMB, a synced volume)
+
+    A job moves between the pending/, claimed/, done/ and failed/ subdirectories by rename, which is
+    atomic, so exactly one worker wins each claim. The claimed file's modification time is the
+    heartbeat, and its contents name the current claim.
+    """
+
+    def __init__(self, root: str, visibility_timeout: float = None, max_attempts: int = None):
+        super().__init__(visibility_timeout, max_attempts)
+        self.root = root
+        for state in (PENDING, CLAIMED, DONE, FAILED, 'tmp'):
+            os.makedirs(os.path.join(root, state), exist_ok=True)
+
+    def _path(self, state: str, job_id: str) -> str:
+        return os.path.join(self.root, state, f"{job_id}.json")
+
+    def _write(self, path: str, job: Dict):
+        """Write a job file in one step so readers never see it half-written"""
+        tmp_path = os.path.join(self.root, 'tmp', f"{uuid.uuid4().hex}.json")
+        with open(tmp_path, 'w') as f:
+            json.dump(job, f, default=str)
+        os.replace(tmp_path, path)
+
+    def _read(self, path: str) -> Dict:
+        with open(path) as f:
+            return json.load(f)
+
+    def _read_claim(self, path: str) -> Optional[Dict]:
+        try:
+            return self._read(path)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _take(self, job: Dict) -> Optional[str]:
+        """Move a job's claimed file out of claimed/ while its claim is still ours, so no requeue scan
+        can release it as well; returns the new path, or None if the claim expired"""
+        claimed_path = self._path(CLAIMED, job['id'])
+        if not self._owns(self._read_claim(claimed_path), job):
+            return None
+        taken_path = os.path.join(self.root, 'tmp', f"{job['id']}-{job.get('claim')}.json")
+        try:
+            os.rename(claimed_path, taken_path)
+        except FileNotFoundError:
+            return None
+        if self._owns(self._read_claim(taken_path), job):
+            return taken_path
+        # Requeued and claimed again between the check and the rename; hand it back
+        os.rename(taken_path, claimed_path)
+        return None
+
+    def _list(self, state: str) -> list:
+        return sorted(name for name in os.listdir(os.path.join(self.root, state)) if name.endswith('.json'))
+
+    def submit(self, job: Dict) -> str:
+        job = self._prepare(job)
+        self._write(self._path(PENDING, job['id']), job)
+        return job['id']
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        for name in self._list(PENDING):
+            source = os.path.join(self.root, PENDING, name)
+            target = os.path.join(self.root, CLAIMED, name)
+            try:
+                # Touch first so the claim never looks expired to another worker's requeue scan
+                os.utime(source)
+                os.rename(source, target)
+            except FileNotFoundError:
+                continue  # another worker claimed it first
+            job = self._claimed(self._read(target), worker_id)
+            self._write(target, job)
+            return job
+        return None
+
+    def heartbeat(self, job: Dict) -> bool:
+        claimed_path = self._path(CLAIMED, job['id'])
+        if not self._owns(self._read_claim(claimed_path), job):
+            return False
+        try:
+            os.utime(claimed_path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def ack(self, job: Dict, result: Dict):
+        taken_path = self._take(job)
+        if taken_path is None:
+            self._stale(job, 'result')
+            return
+        self._write(self._path(DONE, job['id']), dict(job, result=result))
+        os.remove(taken_path)
+
+    def fail(self, job: Dict, error: str):
+        taken_path = self._take(job)
+        if taken_path is None:
+            self._stale(job, 'failure')
+            return
+        job = dict(job, error=error)
+        job.pop('claim', None)
+        state = PENDING if self._retry(job) else FAILED
+        self._write(self._path(state, job['id']), job)
+        os.remove(taken_path)
+
+    def requeue_expired(self) -> int:
+        cutoff = time.time() - self.visibility_timeout
+        released = 0
+        for name in self._list(CLAIMED):
+            path = os.path.join(self.root, CLAIMED, name)
+            try:
+                if os.stat(path).st_mtime >= cutoff:
+                    continue
+                # Taken out of claimed/ first, so the expired claim can no longer be acked or failed
+                taken_path = os.path.join(self.root, 'tmp', f"expired-{uuid.uuid4().hex}-{name}")
+                os.rename(path, taken_path)
+            except FileNotFoundError:
+                continue  # finished, or released by another worker first
+            job = self._read_claim(taken_path)
+            if job is None or os.stat(taken_path).st_mtime >= cutoff:
+                os.rename(taken_path, path)  # a heartbeat landed just before the rename
+                continue
+            job.pop('claim', None)
+            job['error'] = 'visibility timeout expired'
+            state = PENDING if self._retry(job) else FAILED
+            self._write(self._path(state, job['id']), job)
+            os.remove(taken_path)
+            released += 1
+            self.logger.warning(f"Job {job['id']} claimed by {job.get('claimed_by')} expired, moved to {state}")
+        return released
+
+    def counts(self) -> Dict[str, int]:
+        return {state: len(self._list(state)) for state in (PENDING, CLAIMED, DONE, FAILED)}
+
+
+class RedisBroker(Broker):
+    """Broker on a Redis server: a list of pending IDs, a sorted set of claim deadlines and job hashes"""
+
+    # Pop and record the claim deadline and token in one step, so a crash cannot lose the job in between
+    CLAIM_SCRIPT = """
+        local job_id = redis.call('LPOP', KEYS[1])
+        if not job_id then return nil end
+        redis.call('ZADD', KEYS[2], ARGV[1], job_id)
+        redis.call('HSET', KEYS[3], job_id, ARGV[2])
+        return job_id
+    """
+
+    # Renew a claim only while its token is current; XX only updates an existing claim, CH counts it
+    HEARTBEAT_SCRIPT = """
+        if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then return 0 end
+        return redis.call('ZADD', KEYS[1], 'XX', 'CH', ARGV[3], ARGV[1])
+    """
+
+    # End a claim only while its token is current; only the caller that ends it may release the job
+    END_CLAIM_SCRIPT = """
+        if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then return 0 end
+        redis.call('HDEL', KEYS[2], ARGV[1])
+        return redis.call('ZREM', KEYS[1], ARGV[1])
+    """
+
+    # End a claim only if it is still past its deadline, so a heartbeat that just landed wins
+    EXPIRE_SCRIPT = """
+        local deadline = redis.call('ZSCORE', KEYS[1], ARGV[1])
+        if not deadline or tonumber(deadline) > tonumber(ARGV[2]) then return 0 end
+        redis.call('HDEL', KEYS[2], ARGV[1])
+        return redis.call('ZREM', KEYS[1], ARGV[1])
+    """
+
+    def __init__(self, url: str, prefix: str = 'render', visibility_timeout: float = None,
+                 max_attempts: int = None):
+        super().__init__(visibility_timeout, max_attempts)
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("The Redis broker requires redis: pip install redis")
+
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.keys = {state: f"{prefix}:{state}" for state in (PENDING, CLAIMED, DONE, FAILED)}
+        self.jobs_key = f"{prefix}:jobs"
+        self.claims_key = f"{prefix}:claims"
+        self._claim_script = self.redis.register_script(self.CLAIM_SCRIPT)
+        self._heartbeat_script = self.redis.register_script(self.HEARTBEAT_SCRIPT)
+        self._end_claim_script = self.redis.register_script(self.END_CLAIM_SCRIPT)
+        self._expire_script = self.redis.register_script(self.EXPIRE_SCRIPT)
+
+    def submit(self, job: Dict) -> str:
+        job = self._prepare(job)
+        pipe = self.redis.pipeline()
+        pipe.hset(self.jobs_key, job['id'], json.dumps(job, default=str))
+        pipe.rpush(self.keys[PENDING], job['id'])
+        pipe.execute()
+        return job['id']
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        while True:
+            claim = uuid.uuid4().hex
+            job_id = self._claim_script(
+                keys=[self.keys[PENDING], self.keys[CLAIMED], self.claims_key],
+                args=[time.time() + self.visibility_timeout, claim]
+            )
+            if job_id is None:
+                return None
+            data = self.redis.hget(self.jobs_key, job_id)
+            if data is None:
+                self._end_claim(job_id, claim)  # finished by an earlier attempt
+                continue
+            job = self._claimed(json.loads(data), worker_id, claim)
+            self.redis.hset(self.jobs_key, job_id, json.dumps(job, default=str))
+            return job
+
+    def _end_claim(self, job_id: str, claim: str) -> bool:
+        return bool(self._end_claim_script(keys=[self.keys[CLAIMED], self.claims_key], args=[job_id, claim]))
+
+    def heartbeat(self, job: Dict) -> bool:
+        return bool(self._heartbeat_script(
+            keys=[self.keys[CLAIMED], self.claims_key],
+            args=[job['id'], job.get('claim'), time.time() + self.visibility_timeout]
+        ))
+
+    def ack(self, job: Dict, result: Dict):
+        if not self._end_claim(job['id'], job.get('claim')):
+            self._stale(job, 'result')
+            return
+        pipe = self.redis.pipeline()
+        pipe.hdel(self.jobs_key, job['id'])
+        pipe.hset(self.keys[DONE], job['id'], json.dumps(dict(job, result=result), default=str))
+        pipe.execute()
+
+    def fail(self, job: Dict, error: str):
+        if not self._end_claim(job['id'], job.get('claim')):
+            self._stale(job, 'failure')
+            return
+        self._release(dict(job, error=error))
+
+    def _release(self, job: Dict):
+        pipe = self.redis.pipeline()
+        if self._retry(job):
+            pipe.hset(self.jobs_key, job['id'], json.dumps(job, default=str))
+            pipe.rpush(self.keys[PENDING], job['id'])
+        else:
+            pipe.hdel(self.jobs_key, job['id'])
+            pipe.hset(self.keys[FAILED], job['id'], json.dumps(job, default=str))
+        pipe.execute()
+
+    def requeue_expired(self) -> int:
+        released = 0
+        now = time.time()
+        for job_id in self.redis.zrangebyscore(self.keys[CLAIMED], '-inf', now):
+            if not self._expire_script(keys=[self.keys[CLAIMED], self.claims_key], args=[job_id, now]):
+                continue  # renewed, or another worker released it first
+            data = self.redis.hget(self.jobs_key, job_id)
+            if data is None:
+                continue
+            job = dict(json.loads(data), error='visibility timeout expired')
+            self._release(job)
+            released += 1
+            self.logger.warning(f"Job {job_id} claimed by {job.get('claimed_by')} expired and was released")
+        return released
+
+    def counts(self) -> Dict[str, int]:
+        pipe = self.redis.pipeline()
+        pipe.llen(self.keys[PENDING])
+        pipe.zcard(self.keys[CLAIMED])
+        pipe.hlen(self.keys[DONE])
+        pipe.hlen(self.keys[FAILED])
+        return dict(zip((PENDING, CLAIMED, DONE, FAILED), pipe.execute()))
@@ -0,0 +1,101 @@
+import os
+import errno
+import json
+import time
+import shutil
+import hashlib
+from src.instrumentation import get_logger
+from config.settings import Config
+
+
+class RenderCache:
+    """Content-addressed store of rendered videos with size-bounded LRU eviction"""
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        self.cache_dir = cache_dir or Config.RENDER_CACHE_DIR
+        self.max_bytes = max_bytes or Config.RENDER_CACHE_MAX_BYTES
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.logger = get_logger(__name__, 'video_generator.log')
+
+    def make_key(self, inputs: dict) -> str:
+        """Hash every input that affects the rendered output"""
+        payload = json.dumps(inputs, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.mp4")
+
+    def temp_path(self, key: str) -> str:
+        """Scratch path to render into before the result is published with put()"""
+        return os.path.join(self.cache_dir, f"tmp_{os.getpid()}_{time.monotonic_ns()}_{key[:16]}.mp4")
+
+    def owns(self, path: str) -> bool:
+        """Whether a path is a cache entry (callers must not delete those)"""
+        return os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.cache_dir)
+
+    def get(self, key: str) -> str:
+        """Cached path for key, marked as recently used, or None"""
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        # LRU order is kept in atime; mtime stays untouched so the file still looks unchanged
+        stat = os.stat(path)
+        os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+        self.logger.info(f"Render cache hit: {path}")
+        return path
+
+    def put(self, key: str, rendered_path: str) -> str:
+        """Move a freshly rendered file into the cache and evict old entries if over budget"""
+        path = self.path_for(key)
+        try:
+            os.replace(rendered_path, path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # Rendered on another filesystem (scratch space): copy next to the entry, then swap it in
+            temp_path = self.temp_path(key)
+            shutil.move(rendered_path, temp_path)
+            os.replace(temp_path, path)
+        self.evict()
+        return path
+
+    def export(self, key: str, output_path: str) -> str:
+        """Make a cached video available at output_path without re-encoding"""
+        source = self.path_for(key)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        try:
+            os.link(source, output_path)
+        except OSError:
+            shutil.copy2(source, output_path)
+        return output_path
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits its size budget"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.mp4') or name.startswith('tmp_'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        # Entries used very recently may still be uploading
+        protected_after = time.time() - Config.RENDER_CACHE_MIN_AGE
+        for last_used, size, path in sorted(entries):
+            if total <= self.max_bytes or last_used > protected_after:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.logger.info(f"Render cache evicted {path} ({size / 1e6:.1f} MB)")
+            except FileNotFoundError:
+                pass
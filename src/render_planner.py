@@ -0,0 +1,98 @@
+import heapq
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from src.job_store import CLAIMABLE_STATES
+from src.youtube_uploader import parse_publish_time
+from src.instrumentation import get_logger
+from config.settings import Config
+
+
+class RenderPlanner:
+    """Plans render start times from the scheduled_time column so every upload lands before its slot"""
+
+    def __init__(self, excel_processor, job_store, workers: int = None):
+        self.excel_processor = excel_processor
+        self.job_store = job_store
+        # Each scheduled job renders and then uploads on the same scheduler thread
+        self.workers = workers or Config.SCHEDULER_WORKERS
+        self.setup_logging()
+
+    def setup_logging(self):
+        self.logger = get_logger(__name__, 'scheduler.log')
+
+    def estimate_durations(self) -> Dict[str, float]:
+        """Expected render and upload seconds from history, padded by the safety factor"""
+        render = self.job_store.average_timing('render') or Config.PLAN_DEFAULT_RENDER_SECONDS
+        upload = self.job_store.average_timing('upload') or Config.PLAN_DEFAULT_UPLOAD_SECONDS
+        return {
+            'render': render * Config.PLAN_SAFETY_FACTOR,
+            'upload': upload * Config.PLAN_SAFETY_FACTOR
+        }
+
+    def future_slots(self, now: datetime) -> List[tuple]:
+        """(row_index, publish_at) for unfinished rows whose scheduled_time is still ahead"""
+        states = {job['row_index']: job['state'] for job in self.job_store.list_jobs()}
+        scheduled_times = self.excel_processor.load_index()['quotes']['scheduled_time']
+
+        slots = []
+        for row_index, value in enumerate(scheduled_times):
+            if states.get(row_index, CLAIMABLE_STATES[0]) not in CLAIMABLE_STATES:
+                continue
+            try:
+                publish_at = parse_publish_time(value)
+            except ValueError:
+                self.logger.warning(f"Row {row_index} has an unreadable scheduled_time: {value}")
+                continue
+            if publish_at and publish_at > now:
+                slots.append((row_index, publish_at))
+        return slots
+
+    def _latest_starts(self, deadlines: List[datetime], duration: timedelta, lanes: int) -> List[datetime]:
+        """As-late-as-possible start per deadline with at most `lanes` tasks running at once"""
+        starts = [None] * len(deadlines)
+        # Max-heap of the time each lane is free until (it is busy from then on)
+        free_until = [(-float('inf'), lane) for lane in range(lanes)]
+        heapq.heapify(free_until)
+
+        for position in sorted(range(len(deadlines)), key=lambda i: deadlines[i], reverse=True):
+            latest_free, lane = heapq.heappop(free_until)
+            finish = min(deadlines[position].timestamp(), -latest_free)
+            start = finish - duration.total_seconds()
+            starts[position] = datetime.fromtimestamp(start, tz=timezone.utc)
+            heapq.heappush(free_until, (-start, lane))
+        return starts
+
+    def plan(self, now: datetime = None) -> List[Dict]:
+        """Render start time for every future slot, earliest first"""
+        now = now or datetime.now(timezone.utc)
+        slots = self.future_slots(now)
+        if not slots:
+            return []
+
+        durations = self.estimate_durations()
+        render_time = timedelta(seconds=durations['render'])
+        job_time = render_time + timedelta(seconds=durations['upload'])
+        margin = timedelta(minutes=Config.PLAN_MARGIN_MINUTES)
+
+        # Work backwards: a job holds one worker from render start until its upload ends, which must
+        # be before its slot. Bursts of slots are pushed into the idle time before them.
+        deadlines = [publish_at - margin for _, publish_at in slots]
+        starts = self._latest_starts(deadlines, job_time, self.workers)
+
+        plan = []
+        for (row_index, publish_at), start_at in zip(slots, starts):
+            plan.append({
+                'row_index': row_index,
+                'start_at': max(start_at, now),
+                'upload_start': start_at + render_time,
+                'publish_at': publish_at,
+                'at_risk': start_at < now
+            })
+        plan.sort(key=lambda entry: (entry['start_at'], entry['publish_at']))
+
+        at_risk = sum(1 for entry in plan if entry['at_risk'])
+        self.logger.info(
+            f"Planned {len(plan)} renders (render {durations['render']:.0f}s, upload {durations['upload']:.0f}s "
+            f"per video on {self.workers} workers); {at_risk} may miss their slot"
+        )
+        return plan
@@ -0,0 +1,188 @@
+import os
+import glob
+import json
+import math
+import time
+import uuid
+import socket
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Tuple
+from src.instrumentation import get_logger, get_metrics
+from config.settings import Config
+
+
+def plain_value(value):
+    """JSON-safe copy of a spreadsheet value (numpy scalars, NaN, timestamps)"""
+    if isinstance(value, dict):
+        return {key: plain_value(item) for key, item in value.items()}
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def video_path_for(output_dir: str, row_index: int) -> str:
+    return os.path.join(output_dir, f"row_{row_index:05d}.mp4")
+
+
+def sidecar_path(video_path: str) -> str:
+    return os.path.splitext(video_path)[0] + '.json'
+
+
+def is_rendered(video_path: str) -> bool:
+    """Whether a video and its sidecar are both in place; the sidecar is written last"""
+    return os.path.exists(video_path) and os.path.exists(sidecar_path(video_path))
+
+
+def write_sidecar(path: str, record: dict):
+    """Write metadata next to a video; the temp file and rename keep readers from seeing half a file"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(record, f, indent=2, default=str)
+    os.replace(temp_path, path)
+
+
+def sidecar_record(row_index: int, video_path: str, video_data: dict, profile: str = None, **extra) -> dict:
+    """Sidecar contents read by the upload command"""
+    record = {
+        'row_index': row_index,
+        'video': os.path.basename(video_path),
+        'video_data': plain_value(video_data),
+        'profile': profile or Config.DEFAULT_ENCODE_PROFILE,
+        'rendered_at': datetime.now(timezone.utc).isoformat(),
+        'video_id': None
+    }
+    record.update(extra)
+    return record
+
+
+def render_job(row_index: int, video_data: dict, profile: str = None, layout: str = None,
+               force: bool = False) -> dict:
+    """Broker payload for one row, carrying the resolved quote and music so any node can render it"""
+    return {
+        'row_index': row_index,
+        'video_data': plain_value(video_data),
+        'profile': profile,
+        'layout': layout,
+        'force': force
+    }
+
+
+class RenderWorker:
+    """Render jobs pulled from a broker into a shared output directory, as the render command lays it out"""
+
+    def __init__(self, broker, output_dir: str = None, worker_id: str = None):
+        self.broker = broker
+        self.output_dir = output_dir or Config.RENDER_OUTPUT_DIR
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.setup_logging()
+        self.metrics = get_metrics()
+        self._video_generator = None
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def setup_logging(self):
+        self.logger = get_logger(__name__, 'render_worker.log')
+
+    @property
+    def video_generator(self):
+        # Built on the first job; idle workers and submit-only runs never load the renderer
+        if self._video_generator is None:
+            from src.video_generator import VideoGenerator
+            self._video_generator = VideoGenerator()
+        return self._video_generator
+
+    def run(self, stop: threading.Event = None, once: bool = False, poll: float = 5) -> Tuple[int, int]:
+        """Process jobs until stopped, or until the queue is empty with once; returns (processed, failed)"""
+        stop = stop or threading.Event()
+        processed = failed = 0
+        self.logger.info(f"Render worker {self.worker_id} started, writing to {self.output_dir}")
+        while not stop.is_set():
+            # Every worker sweeps for crashed peers, so no coordinator has to
+            self.broker.requeue_expired()
+            job = self.broker.claim(self.worker_id)
+            if job is None:
+                if once:
+                    break
+                stop.wait(poll)
+                continue
+            if self.process(job):
+                processed += 1
+            else:
+                failed += 1
+        self.logger.info(f"Render worker {self.worker_id} stopped: {processed} processed, {failed} failed")
+        return processed, failed
+
+    def process(self, job: Dict) -> bool:
+        """Render one claimed job, sending heartbeats meanwhile, and report the outcome to the broker"""
+        beating = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, beating), daemon=True)
+        heartbeat.start()
+        try:
+            with self.metrics.span('render_job', row=job['row_index'], attempt=job['attempts']) as span:
+                result = self.render(job)
+                span.update(result)
+        except Exception as e:
+            self.logger.error(f"Error rendering job {job['id']} (row {job['row_index']}): {str(e)}")
+            self.broker.fail(job, str(e))
+            self.metrics.inc('render_jobs_total', outcome='failed')
+            return False
+        finally:
+            beating.set()
+            heartbeat.join()
+
+        self.broker.ack(job, result)
+        self.metrics.inc('render_jobs_total', outcome='skipped' if result.get('skipped') else 'rendered')
+        return True
+
+    def _heartbeat(self, job: Dict, stop: threading.Event):
+        while not stop.wait(Config.RENDER_HEARTBEAT_SECONDS):
+            try:
+                if not self.broker.heartbeat(job):
+                    self.logger.warning(f"Lost the claim on job {job['id']}; finishing it anyway")
+                    return
+            except Exception as e:
+                self.logger.warning(f"Heartbeat for job {job['id']} failed: {str(e)}")
+
+    def remove_abandoned_renders(self, row_index: int):
+        """Delete partial renders of a row left by crashed attempts. A file written to within the
+        visibility timeout may belong to a worker whose claim expired but which is still rendering"""
+        cutoff = time.time() - self.broker.visibility_timeout
+        for stale_path in glob.glob(os.path.join(self.output_dir, f"tmp_*_{row_index:05d}.mp4")):
+            try:
+                if os.path.getmtime(stale_path) < cutoff:
+                    os.remove(stale_path)
+                    self.logger.info(f"Removed abandoned partial render {stale_path}")
+            except FileNotFoundError:
+                pass  # finished or cleaned up by another worker meanwhile
+
+    def render(self, job: Dict) -> Dict:
+        """Render a job's row to row_NNNNN.mp4 plus sidecar; the sidecar appears only once the video is complete"""
+        row_index = job['row_index']
+        video_path = video_path_for(self.output_dir, row_index)
+        if not job.get('force') and is_rendered(video_path):
+            return {'video': os.path.basename(video_path), 'skipped': True}
+
+        if job['attempts'] > 1:
+            self.remove_abandoned_renders(row_index)
+
+        # Rendered under a temporary name carrying the claim and renamed within the output directory,
+        # so readers on other hosts never see a partial file
+        claim = job.get('claim') or uuid.uuid4().hex
+        temp_path = os.path.join(self.output_dir, f"tmp_{claim}_{row_index:05d}.mp4")
+        try:
+            path = self.video_generator.generate_video(job['video_data'], temp_path, job.get('profile'),
+                                                       job.get('layout'))
+            os.replace(path, video_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        write_sidecar(sidecar_path(video_path), sidecar_record(
+            row_index, video_path, job['video_data'], job.get('profile'), rendered_by=self.worker_id
+        ))
+        self.logger.info(f"Rendered row {row_index} to {video_path}")
+        return {'video': os.path.basename(video_path), 'worker': self.worker_id}
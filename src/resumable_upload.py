@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import random
+import hashlib
+import requests
+from src.instrumentation import get_logger, get_metrics
+from config.settings import Config
+
+RETRIABLE_STATUS_CODES = (500, 502, 503, 504)
+RETRIABLE_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+CHUNK_ALIGNMENT = 256 * 1024  # resumable chunks must be multiples of 256 KiB
+
+
+class ResumableUpload:
+    """Chunked YouTube resumable upload that survives dropped connections and restarts"""
+
+    def __init__(self, session, file_path: str, body: dict, part: str = None, upload_url: str = None,
+                 chunk_size: int = None, max_retries: int = None, state_dir: str = None,
+                 mimetype: str = 'video/*', progress_callback=None):
+        self.session = session
+        self.file_path = file_path
+        self.body = body
+        self.part = part or ','.join(body.keys())
+        self.upload_url = upload_url or Config.YOUTUBE_UPLOAD_URL
+        self.chunk_size = chunk_size or Config.UPLOAD_CHUNK_SIZE
+        self.max_retries = Config.UPLOAD_MAX_RETRIES if max_retries is None else max_retries
+        self.state_dir = state_dir or Config.UPLOAD_STATE_DIR
+        self.mimetype = mimetype
+        self.progress_callback = progress_callback
+        self.logger = get_logger(__name__, 'youtube_uploader.log')
+        self.metrics = get_metrics()
+        self.bytes_sent = 0  # including chunks resent after errors
+
+        if self.chunk_size % CHUNK_ALIGNMENT != 0:
+            raise ValueError(f"Upload chunk size must be a multiple of {CHUNK_ALIGNMENT} bytes")
+
+        self.total_size = os.path.getsize(file_path)
+        self.state_path = self._state_path()
+
+    def _state_path(self) -> str:
+        """State file identifying this file and metadata"""
+        stat = os.stat(self.file_path)
+        key = json.dumps(
+            [os.path.abspath(self.file_path), stat.st_size, stat.st_mtime_ns, self.part, self.body],
+            sort_keys=True, default=str
+        )
+        return os.path.join(self.state_dir, f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json")
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return None
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable upload state {self.state_path}: {str(e)}")
+            return None
+
+    def _save_state(self, session_uri: str, offset: int):
+        os.makedirs(self.state_dir, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'session_uri': session_uri, 'offset': offset, 'file': self.file_path}, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _clear_state(self):
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    def _start_session(self) -> str:
+        """Open a new upload session and return its URI"""
+        response = self.session.post(
+            self.upload_url,
+            params={'uploadType': 'resumable', 'part': self.part},
+            headers={
+                'Content-Type': 'application/json; charset=UTF-8',
+                'X-Upload-Content-Length': str(self.total_size),
+                'X-Upload-Content-Type': self.mimetype
+            },
+            data=json.dumps(self.body)
+        )
+        self._raise_for_status(response)
+        session_uri = response.headers['Location']
+        self._save_state(session_uri, 0)
+        self.logger.info(f"Started resumable upload session for {self.file_path}")
+        return session_uri
+
+    def _query_offset(self, session_uri: str):
+        """Ask the server how many bytes it has; returns the offset or the finished resource"""
+        response = self.session.put(
+            session_uri,
+            headers={'Content-Length': '0', 'Content-Range': f'bytes */{self.total_size}'}
+        )
+        return self._handle_response(response)
+
+    def _send_chunk(self, session_uri: str, offset: int):
+        """Send one chunk starting at offset; returns the new offset or the finished resource"""
+        with open(self.file_path, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read(self.chunk_size)
+
+        end = offset + len(chunk) - 1
+        response = self.session.put(
+            session_uri,
+            headers={
+                'Content-Length': str(len(chunk)),
+                'Content-Range': f'bytes {offset}-{end}/{self.total_size}'
+            },
+            data=chunk
+        )
+        self.bytes_sent += len(chunk)
+        self.metrics.inc('bytes_uploaded_total', len(chunk))
+        return self._handle_response(response)
+
+    def _handle_response(self, response):
+        if response.status_code in (200, 201):
+            return response.json()
+        if response.status_code == 308:
+            # Range: bytes=0-N means N + 1 bytes are stored; no header means none are
+            received = response.headers.get('Range')
+            return int(received.rsplit('-', 1)[1]) + 1 if received else 0
+        self._raise_for_status(response)
+        raise requests.HTTPError(f"Unexpected upload response {response.status_code}", response=response)
+
+    def _raise_for_status(self, response):
+        if response.status_code >= 400:
+            raise requests.HTTPError(
+                f"{response.status_code} error during upload: {response.text[:500]}", response=response
+            )
+
+    def _is_retriable(self, error: Exception) -> bool:
+        if isinstance(error, RETRIABLE_EXCEPTIONS):
+            return True
+        response = getattr(error, 'response', None)
+        return response is not None and response.status_code in RETRIABLE_STATUS_CODES
+
+    def _backoff(self, attempt: int):
+        delay = min(Config.UPLOAD_MAX_BACKOFF, Config.UPLOAD_INITIAL_BACKOFF * (2 ** attempt))
+        delay *= random.uniform(0.5, 1.0)
+        self.logger.warning(f"Retrying upload of {self.file_path} in {delay:.1f}s (attempt {attempt + 1})")
+        time.sleep(delay)
+
+    def execute(self) -> dict:
+        """Upload the file, resuming a persisted session if there is one, and return the video resource"""
+        session_uri = None
+        offset = 0
+        needs_sync = False
+
+        state = self._load_state()
+        if state:
+            session_uri = state['session_uri']
+            needs_sync = True
+            self.logger.info(f"Resuming upload of {self.file_path} from byte {state['offset']}")
+
+        attempt = 0
+        while True:
+            try:
+                if session_uri is None:
+                    session_uri = self._start_session()
+                    offset = 0
+                    needs_sync = False
+
+                # After an error or restart the server's byte count is authoritative
+                result = self._query_offset(session_uri) if needs_sync else self._send_chunk(session_uri, offset)
+                needs_sync = False
+
+                if isinstance(result, dict):
+                    self._clear_state()
+                    if self.progress_callback:
+                        self.progress_callback(self.total_size, self.total_size)
+                    return result
+
+                # Only progress resets the retry budget; a status query alone does not
+                if result > offset:
+                    attempt = 0
+                offset = result
+                self._save_state(session_uri, offset)
+                if self.progress_callback:
+                    self.progress_callback(offset, self.total_size)
+
+            except Exception as e:
+                response = getattr(e, 'response', None)
+                if response is not None and response.status_code in (404, 410) and session_uri:
+                    # Session expired on the server: start over with a fresh one
+                    self.logger.warning(f"Upload session expired for {self.file_path}, restarting")
+                    self._clear_state()
+                    session_uri = None
+                    continue
+
+                if not self._is_retriable(e) or attempt >= self.max_retries:
+                    self.logger.error(f"Upload of {self.file_path} failed: {str(e)}")
+                    raise
+
+                self.metrics.inc('upload_retries_total')
+                self._backoff(attempt)
+                attempt += 1
+                needs_sync = session_uri is not None
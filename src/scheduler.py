@@ -1,76 +1,177 @@
-import schedule
+import os
 import time
-import threading
-from datetime import datetime, timedelta
 from src.excel_processor import ExcelProcessor
 from src.video_generator import VideoGenerator
-from src.youtube_uploader import YouTubeUploader
-import logging
+from src.upload_service import get_upload_service
+from src.youtube_uploader import format_publish_time, future_publish_time
+from src.job_store import JobStore, RENDERED
+from src.pipeline import VideoPipeline
+from src.event_scheduler import EventScheduler
+from src.render_planner import RenderPlanner
+from src.instrumentation import get_logger, get_metrics
 from config.settings import Config
 
 class VideoScheduler:
     def __init__(self):
         self.excel_processor = ExcelProcessor()
         self.video_generator = VideoGenerator()
-        self.youtube_uploader = YouTubeUploader()
+        self.upload_service = get_upload_service()
+        self.job_store = JobStore()
+        self.event_scheduler = EventScheduler()
+        self.render_planner = RenderPlanner(self.excel_processor, self.job_store)
+        self.metrics = get_metrics()
         self.setup_logging()
-        self.current_row = 0
     
     def setup_logging(self):
-        logging.basicConfig(
-            filename=f'{Config.LOGS_DIR}/scheduler.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
-        self.logger = logging.getLogger(__name__)
+        self.logger = get_logger(__name__, 'scheduler.log')
+    
+    def sync_jobs(self):
+        """Make sure every workbook row has a job in the store"""
+        added = self.job_store.enqueue_rows(range(self.excel_processor.get_row_count()))
+        if added:
+            self.logger.info(f"Added {added} new jobs to the job store")
     
-    def process_video(self):
-        """Process one video from Excel data"""
+    def process_video(self, row_index: int = None, publish_at=None, force: bool = False):
+        """Process one video from Excel data, resuming from its last recorded state;
+        force re-processes a row that is already uploaded, scheduled or failed"""
+        self.sync_jobs()
+        if row_index is not None:
+            job = self.job_store.claim_row(row_index, force)
+        else:
+            job = self.job_store.claim_next()
+        if job is None:
+            self.logger.info("No pending videos to process" if row_index is None
+                             else f"Video {row_index} is already processed or held by another worker")
+            return None
+        
+        row_index = job['row_index']
+        video_path = None
         try:
             # Get video data
-            video_data = self.excel_processor.get_video_data(self.current_row)
-            
-            # Generate video
-            video_path = self.video_generator.generate_video(video_data)
+            video_data = self.excel_processor.get_video_data(row_index)
             
-            # Upload to YouTube
-            video_id = self.youtube_uploader.upload_video(video_path, video_data)
+            # Generate video, unless a previous run already rendered it
+            if job['state'] == RENDERED and job['output_path'] and os.path.exists(job['output_path']):
+                video_path = job['output_path']
+                self.logger.info(f"Reusing rendered video for row {row_index}: {video_path}")
+            else:
+                cached = self.video_generator.has_cached_render(video_data)
+                started = time.monotonic()
+                video_path = self.video_generator.generate_video(video_data)
+                if not cached:
+                    # Near-instant cache hits would drag the planner's render estimate down
+                    self.job_store.record_timing('render', time.monotonic() - started, row_index)
+                if not self.job_store.mark_rendered(row_index, video_path):
+                    # The lease ran out during the render and another worker took the row over
+                    self.logger.warning(f"Lost the claim on video {row_index}; leaving the upload to its new owner")
+                    return None
             
-            # Schedule if time specified
-            scheduled_time = video_data['quote'].get('scheduled_time')
-            if scheduled_time:
-                self.youtube_uploader.schedule_video(video_id, scheduled_time)
+            # Upload to YouTube, scheduled in the same call if a time is specified and still ahead;
+            # the row's own scheduled_time takes precedence over the slot
+            publish_time = future_publish_time(
+                format_publish_time(video_data['quote'].get('scheduled_time')) or format_publish_time(publish_at)
+            )
+            started = time.monotonic()
+            video_id = self.upload_service.upload_video(video_path, video_data, publish_time)
+            self.job_store.record_timing('upload', time.monotonic() - started, row_index)
+            if publish_time:
+                self.job_store.mark_scheduled(row_index, video_id)
+            else:
+                self.job_store.mark_uploaded(row_index, video_id)
             
-            # Clean up video file
-            import os
-            if os.path.exists(video_path):
+            # Clean up video file; cached renders stay for retries and reposts
+            if os.path.exists(video_path) and not self.video_generator.is_cached_output(video_path):
                 os.remove(video_path)
             
-            self.logger.info(f"Successfully processed video {self.current_row}")
-            self.current_row += 1
+            self.logger.info(f"Successfully processed video {row_index}")
+            self.metrics.inc('jobs_total', outcome='scheduled' if publish_time else 'uploaded')
+            return video_id
             
         except Exception as e:
             self.logger.error(f"Error processing video: {str(e)}")
+            self.job_store.mark_failed(row_index, str(e))
+            self.metrics.inc('jobs_total', outcome='failed')
             raise
+        except BaseException:
+            # Interrupted (e.g. Ctrl+C): hand the row straight back instead of holding it for a lease
+            self.job_store.release(row_index)
+            raise
+    
+    def prerender_videos(self, row_indices: list, workers: int = None, output_dir: str = None) -> list:
+        """Render several rows in parallel ahead of upload"""
+        rows = [self.excel_processor.get_video_data(row_index) for row_index in row_indices]
+        return self.video_generator.generate_batch(rows, workers=workers, output_dir=output_dir)
     
-    def schedule_daily_video(self, time_str: str = "09:00"):
-        """Schedule daily video creation"""
-        schedule.every().day.at(time_str).do(self.process_video)
-        self.logger.info(f"Scheduled daily video creation at {time_str}")
+    def render_stream(self, chunk_size: int = None, workers: int = None, output_dir: str = None,
+                      quotes_path: str = None, music_path: str = None):
+        """Render a large sheet chunk by chunk, starting before the whole file is read"""
+        chunks = self.excel_processor.iter_video_data_chunks(chunk_size, quotes_path, music_path)
+        for chunk in chunks:
+            paths = self.video_generator.generate_batch(chunk, workers=workers, output_dir=output_dir)
+            for video_data, video_path in zip(chunk, paths):
+                yield video_data['row_index'], video_path
     
-    def schedule_multiple_videos(self, times: list):
+    def run_pipeline(self, row_indices: list = None, render_workers: int = None,
+                     upload_workers: int = None, max_pending: int = None) -> list:
+        """Process rows with rendering, uploading and scheduling running concurrently"""
+        self.sync_jobs()
+        if row_indices is None:
+            row_indices = list(range(self.excel_processor.get_row_count()))
+        
+        pipeline = VideoPipeline(
+            self.excel_processor,
+            upload_service=self.upload_service,
+            job_store=self.job_store,
+            render_workers=render_workers,
+            upload_workers=upload_workers,
+            max_pending=max_pending
+        )
+        return pipeline.run(row_indices)
+    
+    def process_slot(self, slot):
+        """Process the next video for a publish slot fired by the event scheduler"""
+        return self.process_video(publish_at=slot)
+    
+    def _slot_callback(self, lead_minutes: float):
+        # Without a lead time the slot is just the creation time, as before
+        return self.process_slot if lead_minutes else (lambda slot: self.process_video())
+    
+    def schedule_daily_video(self, time_str: str = "09:00", lead_minutes: float = None):
+        """Schedule daily video creation; with a lead time, render early and publish at time_str"""
+        lead_minutes = Config.RENDER_LEAD_MINUTES if lead_minutes is None else lead_minutes
+        self.event_scheduler.add_daily(time_str, self._slot_callback(lead_minutes), lead_minutes, name='daily_video')
+        self.logger.info(f"Scheduled daily video creation at {time_str} ({lead_minutes} min lead)")
+    
+    def schedule_multiple_videos(self, times: list, lead_minutes: float = None):
         """Schedule multiple videos per day"""
+        lead_minutes = Config.RENDER_LEAD_MINUTES if lead_minutes is None else lead_minutes
         for time_str in times:
-            schedule.every().day.at(time_str).do(self.process_video)
-        self.logger.info(f"Scheduled videos at times: {times}")
+            self.event_scheduler.add_daily(time_str, self._slot_callback(lead_minutes), lead_minutes, name='daily_video')
+        self.logger.info(f"Scheduled videos at times: {times} ({lead_minutes} min lead)")
+    
+    def schedule_render_ahead(self, now=None) -> list:
+        """Queue every future scheduled_time row to render just early enough to make its slot"""
+        self.sync_jobs()
+        plan = self.render_planner.plan(now)
+        for entry in plan:
+            row_index = entry['row_index']
+            self.event_scheduler.add_at(
+                entry['start_at'],
+                lambda slot, row_index=row_index: self.process_video(row_index),
+                slot=entry['publish_at'],
+                name=f'render_row_{row_index}'
+            )
+            if entry['at_risk']:
+                self.logger.warning(f"Row {row_index} may not be uploaded before {entry['publish_at'].isoformat()}")
+        self.logger.info(f"Scheduled {len(plan)} render-ahead jobs")
+        return plan
     
     def run_scheduler(self):
         """Run the scheduler in background"""
-        def scheduler_thread():
-            while True:
-                schedule.run_pending()
-                time.sleep(60)  # Check every minute
-        
-        thread = threading.Thread(target=scheduler_thread, daemon=True)
-        thread.start()
-        self.logger.info("Scheduler started in background")
\ No newline at end of file
+        self.event_scheduler.start()
+        self.logger.info("Scheduler started in background")
+    
+    def stop_scheduler(self):
+        """Stop the background scheduler"""
+        self.event_scheduler.stop()
+        self.metrics.write_prometheus()
@@ -0,0 +1,93 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.youtube_uploader import YouTubeUploader, load_credentials
+from src.instrumentation import get_logger
+from config.settings import Config
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_upload_service():
+    """Return the process-wide upload service, creating it on first use"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = UploadService()
+        return _service
+
+
+class UploadService:
+    """Thread-safe uploads sharing one set of credentials, with one client per worker thread"""
+
+    def __init__(self, concurrency: int = None, credentials=None):
+        self.concurrency = concurrency or Config.UPLOAD_CONCURRENCY
+        self._credentials = credentials
+        self._credentials_lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.setup_logging()
+
+    def setup_logging(self):
+        self.logger = get_logger(__name__, 'youtube_uploader.log')
+
+    def get_credentials(self):
+        """Load credentials once and refresh them under a lock when they expire"""
+        with self._credentials_lock:
+            if self._credentials is None:
+                self._credentials = load_credentials()
+                self.logger.info("Upload service credentials loaded")
+            elif not self._credentials.valid and self._credentials.refresh_token:
+                from google.auth.transport.requests import Request
+                self._credentials.refresh(Request())
+                self.logger.info("Upload service credentials refreshed")
+            return self._credentials
+
+    def get_uploader(self) -> YouTubeUploader:
+        """Uploader owned by the calling thread (httplib2 transports are not thread-safe)"""
+        credentials = self.get_credentials()
+        uploader = getattr(self._local, 'uploader', None)
+        if uploader is None:
+            uploader = YouTubeUploader(credentials=credentials)
+            uploader.authenticate()
+            self._local.uploader = uploader
+        return uploader
+
+    def upload_video(self, video_path: str, video_data: dict, publish_at=None) -> str:
+        """Upload a video on the calling thread"""
+        return self.get_uploader().upload_video(video_path, video_data, publish_at)
+
+    def schedule_video(self, video_id: str, publish_time: str):
+        """Schedule a video on the calling thread"""
+        return self.get_uploader().schedule_video(video_id, publish_time)
+
+    def reschedule_videos(self, publish_times: dict) -> dict:
+        """Batch-update publish times of uploaded videos"""
+        return self.get_uploader().reschedule_videos(publish_times)
+
+    def submit(self, video_path: str, video_data: dict):
+        """Queue an upload on the worker pool and return its future"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='upload')
+        return self._executor.submit(self.upload_video, video_path, video_data)
+
+    def upload_many(self, items: list) -> list:
+        """Upload (video_path, video_data) pairs concurrently; returns video IDs in input order, None on failure"""
+        futures = [self.submit(video_path, video_data) for video_path, video_data in items]
+        results = []
+        for (video_path, _), future in zip(items, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                self.logger.error(f"Error uploading {video_path}: {str(e)}")
+                results.append(None)
+        return results
+
+    def shutdown(self):
+        """Wait for queued uploads and stop the worker pool"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
@@ -1,56 +1,172 @@
 import os
-import random
+import shutil
+import hashlib
+import uuid
+import time
+import threading
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
-from moviepy.editor import *
-from moviepy.video.fx import resize
 import textwrap
+from src.instrumentation import get_logger, get_metrics
 from config.settings import Config
+from src.render_cache import RenderCache
+from src.ffmpeg_encoder import encode_frames, encode_still_frame, encode_music_bed, get_encode_profile, x264_params
+from src.effects import EFFECT_NAMES, QuoteAnimation
 import logging
 
+# Bump when a rendering change should invalidate previously cached videos
+RENDER_VERSION = 1
+
+# Background frames shared by every generator in this process
+_background_cache = {}
+
+# Rendered text overlays, least recently used first
+_overlay_cache = OrderedDict()
+_overlay_lock = threading.Lock()
+
+# Generator reused by batch jobs within one worker process
+_worker_generator = None
+
+
+def file_signature(path: str):
+    """Path, size and modification time of a file, or None if it does not exist"""
+    if not path or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+def get_layout_template(name: str = None) -> dict:
+    """Look up a named layout template from the configuration"""
+    name = name or Config.DEFAULT_LAYOUT
+    if name not in Config.LAYOUT_TEMPLATES:
+        raise ValueError(f"Unknown layout template '{name}'. Available: {list(Config.LAYOUT_TEMPLATES)}")
+    return dict(Config.LAYOUT_TEMPLATES[name], name=name)
+
+
+@lru_cache(maxsize=None)
+def load_font(font_path: str, font_size: int):
+    """Load a font once per process, falling back to the default font"""
+    try:
+        return ImageFont.truetype(font_path, font_size)
+    except OSError:
+        logging.getLogger(__name__).warning("Using default font as custom font not found")
+        return ImageFont.load_default()
+
+
 class VideoGenerator:
     def __init__(self):
         self.setup_logging()
         Config.ensure_directories()
+        self.encode_stats = {}
+        self._stats_lock = threading.Lock()
+        self.metrics = get_metrics()
+        self.render_cache = RenderCache() if Config.RENDER_CACHE_ENABLED else None
     
     def setup_logging(self):
-        logging.basicConfig(
-            filename=f'{Config.LOGS_DIR}/video_generator.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
-        self.logger = logging.getLogger(__name__)
+        self.logger = get_logger(__name__, 'video_generator.log')
     
-    def create_background_image(self, width: int, height: int) -> str:
+    def create_background_image(self, width: int, height: int, palette: str = None) -> np.ndarray:
         """Create a gradient background image"""
-        # Create gradient background
-        img = Image.new('RGB', (width, height), color='black')
-        draw = ImageDraw.Draw(img)
+        palette = palette or Config.DEFAULT_PALETTE
+        divisors, falloff = Config.GRADIENT_PALETTES[palette]
+        key = ('gradient', width, height, tuple(divisors), falloff)
+        
+        def build():
+            # Dark gradient, one row value per line
+            color_values = (255 * (1 - np.arange(height) / height * falloff)).astype(np.int32)
+            row_colors = (color_values[:, None] // np.array(divisors, dtype=np.int32)).astype(np.uint8)
+            return np.ascontiguousarray(np.broadcast_to(row_colors[:, None, :], (height, width, 3)))
+        
+        return self._cached_background(key, build)
+    
+    def load_background_file(self, filename: str, width: int, height: int) -> np.ndarray:
+        """Load an image from the backgrounds directory, resized to the video size"""
+        path = os.path.join(Config.BACKGROUNDS_DIR, filename)
+        key = ('file', os.path.abspath(path), os.path.getmtime(path), width, height)
         
-        # Create gradient effect
-        for i in range(height):
-            color_value = int(255 * (1 - i / height * 0.3))  # Dark gradient
-            color = (color_value // 3, color_value // 4, color_value // 2)  # Blue-ish dark
-            draw.line([(0, i), (width, i)], fill=color)
+        def build():
+            with Image.open(path) as img:
+                return np.array(img.convert('RGB').resize((width, height), Image.LANCZOS))
         
-        bg_path = f"{Config.TEMP_DIR}/background.png"
-        img.save(bg_path)
-        return bg_path
+        return self._cached_background(key, build)
+    
+    def background_spec(self, name: str, width: int, height: int, warn: bool = False) -> tuple:
+        """Identify the background a palette or file name resolves to"""
+        if not isinstance(name, str) or not name.strip():
+            name = None
+        if name and name not in Config.GRADIENT_PALETTES:
+            path = os.path.join(Config.BACKGROUNDS_DIR, name)
+            if os.path.exists(path):
+                return ('file', name, os.path.getmtime(path), width, height)
+            if warn:
+                self.logger.warning(f"Unknown background '{name}', using default palette")
+            name = None
+        palette = name or Config.DEFAULT_PALETTE
+        return ('gradient', palette, tuple(Config.GRADIENT_PALETTES[palette]), width, height)
+    
+    def get_background(self, name: str, width: int, height: int) -> np.ndarray:
+        """Resolve a palette name or backgrounds file name to a background frame"""
+        spec = self.background_spec(name, width, height, warn=True)
+        if spec[0] == 'file':
+            return self.load_background_file(spec[1], width, height)
+        return self.create_background_image(width, height, spec[1])
     
-    def create_text_image(self, text: str, width: int, height: int) -> str:
-        """Create an image with text overlay"""
+    def preload_backgrounds(self, width: int = None, height: int = None):
+        """Build every palette and backgrounds file once so later videos reuse them"""
+        width = width or Config.VIDEO_WIDTH
+        height = height or Config.VIDEO_HEIGHT
+        for palette in Config.GRADIENT_PALETTES:
+            self.create_background_image(width, height, palette)
+        if os.path.isdir(Config.BACKGROUNDS_DIR):
+            for filename in sorted(os.listdir(Config.BACKGROUNDS_DIR)):
+                if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
+                    self.load_background_file(filename, width, height)
+        self.logger.info(f"Preloaded {len(_background_cache)} background(s)")
+    
+    def _cached_background(self, key: tuple, build) -> np.ndarray:
+        """Look a background up in memory, then on disk, building it only on a miss"""
+        if key in _background_cache:
+            return _background_cache[key]
+        
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        cache_path = os.path.join(Config.CACHE_DIR, 'backgrounds', f"{digest}.npy")
+        if os.path.exists(cache_path):
+            array = np.load(cache_path)
+        else:
+            array = build()
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, cache_path)
+        
+        array.setflags(write=False)
+        _background_cache[key] = array
+        return array
+    
+    def create_text_image(self, text: str, width: int, height: int, font_size: int = None,
+                          wrap_width: int = 40) -> np.ndarray:
+        """Create an RGBA text overlay, reusing previously rendered overlays"""
+        font_size = font_size or Config.FONT_SIZE
+        key = (text, Config.DEFAULT_FONT, font_size, wrap_width, width, height)
+        with _overlay_lock:
+            overlay = _overlay_cache.get(key)
+            if overlay is not None:
+                _overlay_cache.move_to_end(key)
+                return overlay
+        
         # Create transparent image for text
         img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
         draw = ImageDraw.Draw(img)
         
-        # Try to load font, fallback to default if not available
-        try:
-            font = ImageFont.truetype(Config.DEFAULT_FONT, Config.FONT_SIZE)
-        except:
-            font = ImageFont.load_default()
-            self.logger.warning("Using default font as custom font not found")
+        font = load_font(Config.DEFAULT_FONT, font_size)
         
         # Wrap text to fit within image
-        wrapped_text = textwrap.fill(text, width=40)  # Adjust based on font size
+        wrapped_text = textwrap.fill(text, width=wrap_width)
         
         # Get text bounding box
         bbox = draw.textbbox((0, 0), wrapped_text, font=font)
@@ -61,83 +177,404 @@ class VideoGenerator:
         x = (width - text_width) // 2
         y = (height - text_height) // 2
         
-        # Draw text with outline for better readability
-        outline_width = 2
-        for dx in range(-outline_width, outline_width + 1):
-            for dy in range(-outline_width, outline_width + 1):
-                if dx != 0 or dy != 0:
-                    draw.multiline_text((x + dx, y + dy), wrapped_text, 
-                                      font=font, fill='black', align='center')
+        # Draw text with outline for better readability, in a single stroked pass
+        draw.multiline_text((x, y), wrapped_text, font=font, fill='white', align='center',
+                            stroke_width=2, stroke_fill='black')
         
-        # Draw main text
-        draw.multiline_text((x, y), wrapped_text, font=font, fill='white', align='center')
+        overlay = np.array(img)
+        overlay.setflags(write=False)
+        with _overlay_lock:
+            _overlay_cache[key] = overlay
+            while len(_overlay_cache) > Config.TEXT_OVERLAY_CACHE_SIZE:
+                _overlay_cache.popitem(last=False)
+        return overlay
+    
+    def is_static_clip(self, clip) -> bool:
+        """Check whether every frame of a clip is identical"""
+        from moviepy.video.VideoClip import ImageClip
+        from moviepy.video.compositing.CompositeVideoClip import CompositeVideoClip
+        if isinstance(clip, CompositeVideoClip):
+            return all(
+                self.is_static_clip(c) and c.start == 0 and
+                (c.end is None or clip.end is None or c.end >= clip.end)
+                for c in clip.clips
+            )
+        return isinstance(clip, ImageClip) and (clip.mask is None or isinstance(clip.mask, ImageClip))
+    
+    def flatten_frame(self, video) -> np.ndarray:
+        """The single RGB frame of a static clip"""
+        frame = video.get_frame(0)
+        if frame.dtype != 'uint8':
+            frame = frame.astype('uint8')
+        return frame
+    
+    def write_static_video(self, video, output_path: str, audio_path: str = None, profile: dict = None,
+                           output_stream=None):
+        """Flatten a static clip into one frame and encode it as a still-image stream"""
+        encode_still_frame(self.flatten_frame(video), output_path, Config.VIDEO_DURATION, Config.VIDEO_FPS,
+                           audio_path, profile, output_stream)
+    
+    def resolve_effects(self, video_data: dict) -> dict:
+        """Effects for a quote, from its 'effects' column or the configured defaults"""
+        names = video_data['quote'].get('effects')
+        if isinstance(names, str) and names.strip():
+            names = [name.strip() for name in names.split(',') if name.strip()]
+        elif not isinstance(names, (list, tuple)):
+            names = Config.DEFAULT_EFFECTS
         
-        text_path = f"{Config.TEMP_DIR}/text_overlay.png"
-        img.save(text_path)
-        return text_path
+        effects = {}
+        for name in names:
+            if name in ('none', 'static'):
+                return {}
+            if name not in EFFECT_NAMES or name not in Config.EFFECTS:
+                self.logger.warning(f"Ignoring unknown effect '{name}'. Available: {list(Config.EFFECTS)}")
+                continue
+            effects[name] = dict(Config.EFFECTS[name])
+        return effects
     
-    def generate_video(self, video_data: dict) -> str:
-        """Generate video from quote and music data"""
+    def write_animated_video(self, video_data: dict, template: dict, effects: dict, output_path: str,
+                             audio_path: str = None, profile: dict = None, output_stream=None):
+        """Encode the animated opening from cached layers, letting FFmpeg hold the settled frame"""
+        quote_text = video_data['quote']['quote']
+        background = self.get_background(
+            video_data['quote'].get('background'), template['width'], template['height']
+        )
+        text_overlay = self.create_text_image(
+            quote_text, template['width'], template['height'], template['font_size'], template['wrap_width']
+        )
+        wrapped_text = textwrap.fill(quote_text, width=template['wrap_width'])
+        animation = QuoteAnimation(
+            background, text_overlay, effects,
+            line_count=wrapped_text.count('\n') + 1,
+            char_count=sum(1 for char in wrapped_text if not char.isspace()),
+            opacity=0.9
+        )
+        encode_frames(animation.frames(Config.VIDEO_FPS), output_path, Config.VIDEO_DURATION, Config.VIDEO_FPS,
+                      audio_path, profile, output_stream)
+    
+    def record_encode(self, profile_name: str, seconds: float, output_path: str):
+        """Accumulate encode time and output size for a profile"""
+        size = os.path.getsize(output_path)
+        with self._stats_lock:
+            stats = self.encode_stats.setdefault(
+                profile_name, {'videos': 0, 'seconds': 0.0, 'bytes': 0, 'video_seconds': 0.0}
+            )
+            stats['videos'] += 1
+            stats['seconds'] += seconds
+            stats['bytes'] += size
+            stats['video_seconds'] += Config.VIDEO_DURATION
+        self.metrics.inc('bytes_written_total', size, profile=profile_name)
+        self.logger.info(
+            f"Encoded {output_path} with '{profile_name}' in {seconds:.2f}s "
+            f"({Config.VIDEO_DURATION / max(seconds, 1e-6):.1f}x realtime, {size / 1e6:.2f} MB)"
+        )
+    
+    def encode_report(self) -> dict:
+        """Measured encode speed and output size per profile"""
+        report = {}
+        for profile_name, stats in self.encode_stats.items():
+            report[profile_name] = {
+                'videos': stats['videos'],
+                'avg_encode_seconds': stats['seconds'] / stats['videos'],
+                'speed_x_realtime': stats['video_seconds'] / max(stats['seconds'], 1e-6),
+                'avg_size_bytes': stats['bytes'] / stats['videos'],
+                'avg_bitrate_kbps': stats['bytes'] * 8 / 1000 / max(stats['video_seconds'], 1e-6)
+            }
+        return report
+    
+    def compare_encode_profiles(self, video_data: dict, profiles: list = None, output_dir: str = None) -> dict:
+        """Render the same video with each profile and report speed against size"""
+        output_dir = output_dir or Config.TEMP_DIR
+        for profile_name in profiles or list(Config.ENCODE_PROFILES):
+            output_path = os.path.join(output_dir, f"profile_test_{profile_name}.mp4")
+            try:
+                # A cache hit would not be encoded, and so not measured
+                self.generate_video(video_data, output_path, profile=profile_name, use_cache=False)
+            finally:
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+        return self.encode_report()
+    
+    def get_music_bed(self, music_file: str, duration: float, volume: float) -> str:
+        """Return an AAC music bed looped or trimmed to duration, encoding it only once"""
+        stat = os.stat(music_file)
+        key = (os.path.abspath(music_file), stat.st_mtime_ns, stat.st_size, duration, volume)
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        bed_path = os.path.join(Config.CACHE_DIR, 'audio', f"{digest}.m4a")
+        if os.path.exists(bed_path):
+            return bed_path
+        
+        os.makedirs(os.path.dirname(bed_path), exist_ok=True)
+        tmp_path = os.path.join(os.path.dirname(bed_path), f"tmp_{uuid.uuid4().hex}_{digest}.m4a")
         try:
-            quote_text = video_data['quote']['quote']
-            music_file = video_data['music']['music_file']
-            
-            self.logger.info(f"Generating video for quote: {quote_text[:50]}...")
-            
-            # Create background
-            bg_path = self.create_background_image(Config.VIDEO_WIDTH, Config.VIDEO_HEIGHT)
-            
-            # Create text overlay
-            text_path = self.create_text_image(quote_text, Config.VIDEO_WIDTH, Config.VIDEO_HEIGHT)
-            
-            # Create video clip from background
-            bg_clip = ImageClip(bg_path, duration=Config.VIDEO_DURATION)
-            
-            # Create text clip
-            text_clip = ImageClip(text_path, duration=Config.VIDEO_DURATION).set_opacity(0.9)
-            
-            # Composite video
-            video = CompositeVideoClip([bg_clip, text_clip])
-            
-            # Add music if available
-            if music_file and os.path.exists(music_file):
-                audio = AudioFileClip(music_file)
-                # Trim or loop audio to match video duration
-                if audio.duration > Config.VIDEO_DURATION:
-                    audio = audio.subclip(0, Config.VIDEO_DURATION)
-                elif audio.duration < Config.VIDEO_DURATION:
-                    # Loop audio to match video duration
-                    loops = int(Config.VIDEO_DURATION / audio.duration) + 1
-                    audio = concatenate_audioclips([audio] * loops).subclip(0, Config.VIDEO_DURATION)
+            encode_music_bed(music_file, tmp_path, duration, volume)
+            os.replace(tmp_path, bed_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        
+        self.logger.info(f"Music bed cached for {music_file}: {bed_path}")
+        return bed_path
+    
+    def render_inputs(self, video_data: dict, encode_profile: dict, layout: dict = None) -> dict:
+        """Everything that determines the rendered output, used as the render cache key"""
+        layout = layout or get_layout_template()
+        music_file = video_data['music']['music_file']
+        has_music = bool(music_file) and os.path.exists(music_file)
+        return {
+            'version': RENDER_VERSION,
+            'quote': video_data['quote']['quote'],
+            'font': file_signature(Config.DEFAULT_FONT),
+            'layout': layout,
+            'background': self.background_spec(
+                video_data['quote'].get('background'), layout['width'], layout['height']
+            ),
+            'music': file_signature(music_file) if has_music else None,
+            'music_volume': Config.MUSIC_VOLUME,
+            'effects': self.resolve_effects(video_data),
+            'profile': encode_profile,
+            'duration': Config.VIDEO_DURATION,
+            'fps': Config.VIDEO_FPS
+        }
+    
+    def has_cached_render(self, video_data: dict, profile: str = None, layout: str = None) -> bool:
+        """Whether generate_video would reuse a cached render instead of encoding"""
+        if self.render_cache is None:
+            return False
+        inputs = self.render_inputs(video_data, get_encode_profile(profile), get_layout_template(layout))
+        return os.path.exists(self.render_cache.path_for(self.render_cache.make_key(inputs)))
+    
+    def is_cached_output(self, path: str) -> bool:
+        """Whether a path returned by generate_video belongs to the render cache"""
+        return self.render_cache is not None and self.render_cache.owns(path)
+    
+    def compose_video(self, video_data: dict, template: dict) -> tuple:
+        """Build the in-memory composite clip for a layout, plus the music bed to stream-copy (or None)"""
+        # Imported from their own modules: moviepy.editor also loads IPython helpers and every effect
+        from moviepy.video.VideoClip import ImageClip
+        from moviepy.video.compositing.CompositeVideoClip import CompositeVideoClip
+        quote_text = video_data['quote']['quote']
+        
+        # Create background
+        background = self.get_background(
+            video_data['quote'].get('background'), template['width'], template['height']
+        )
+        
+        # Create text overlay
+        text_overlay = self.create_text_image(
+            quote_text, template['width'], template['height'], template['font_size'], template['wrap_width']
+        )
+        
+        # Create video clip from background
+        bg_clip = ImageClip(background, duration=Config.VIDEO_DURATION)
+        
+        # Create text clip
+        text_clip = ImageClip(text_overlay, duration=Config.VIDEO_DURATION).set_opacity(0.9)
+        
+        # Composite video
+        video = CompositeVideoClip([bg_clip, text_clip])
+        
+        # Set video properties
+        return video.set_fps(Config.VIDEO_FPS), self.get_audio_path(video_data)
+    
+    def get_audio_path(self, video_data: dict) -> str:
+        """Music bed for a video, looped or trimmed to the video duration at background volume, or None"""
+        music_file = video_data['music']['music_file']
+        if music_file and os.path.exists(music_file):
+            return self.get_music_bed(music_file, Config.VIDEO_DURATION, Config.MUSIC_VOLUME)
+        return None
+    
+    def generate_video(self, video_data: dict, output_path: str = None, profile: str = None,
+                       layout: str = None, use_cache: bool = True) -> str:
+        """Generate video from quote and music data, reusing an identical earlier render if cached;
+        use_cache=False always encodes and leaves the cache untouched"""
+        with self.metrics.span('render', profile=profile or Config.DEFAULT_ENCODE_PROFILE,
+                               layout=layout or Config.DEFAULT_LAYOUT) as span:
+            cache_key = None
+            render_path = None
+            try:
+                encode_profile = get_encode_profile(profile)
+                template = get_layout_template(layout)
+                quote_text = video_data['quote']['quote']
+                
+                if self.render_cache is not None and use_cache:
+                    cache_key = self.render_cache.make_key(self.render_inputs(video_data, encode_profile, template))
+                    cached_path = self.render_cache.get(cache_key)
+                    span['cache_hit'] = bool(cached_path)
+                    if cached_path:
+                        self.metrics.inc('render_cache_hits_total')
+                        return self.render_cache.export(cache_key, output_path) if output_path else cached_path
+                
+                self.logger.info(f"Generating video for quote: {quote_text[:50]}...")
+                effects = self.resolve_effects(video_data)
+                if effects:
+                    video, audio_path = None, self.get_audio_path(video_data)
+                else:
+                    video, audio_path = self.compose_video(video_data, template)
                 
-                audio = audio.volumex(0.3)  # Lower volume for background music
-                video = video.set_audio(audio)
+                # Output path; with scratch space (e.g. tmpfs) configured the encoder writes there and
+                # slower or shared storage only receives the finished file. Cached renders are otherwise
+                # written next to the cache and moved in when complete.
+                if Config.RENDER_SCRATCH_DIR:
+                    os.makedirs(Config.RENDER_SCRATCH_DIR, exist_ok=True)
+                    render_path = os.path.join(Config.RENDER_SCRATCH_DIR, f"tmp_{uuid.uuid4().hex}.mp4")
+                elif cache_key:
+                    render_path = self.render_cache.temp_path(cache_key)
+                else:
+                    render_path = output_path or f"{Config.TEMP_DIR}/generated_video_{uuid.uuid4().hex}.mp4"
+                
+                # Write video file, stream-copying the cached music bed
+                started = time.monotonic()
+                with self.metrics.span('encode', profile=encode_profile['name']) as encode_span:
+                    if effects:
+                        encode_span['path'] = 'animated'
+                        encode_span['effects'] = ','.join(effects)
+                        self.write_animated_video(video_data, template, effects, render_path, audio_path,
+                                                  encode_profile)
+                    elif Config.STATIC_FAST_PATH and self.is_static_clip(video):
+                        encode_span['path'] = 'static'
+                        self.write_static_video(video, render_path, audio_path, encode_profile)
+                    else:
+                        encode_span['path'] = 'composite'
+                        video.write_videofile(
+                            render_path,
+                            codec='libx264',
+                            preset=encode_profile['preset'],
+                            threads=encode_profile['threads'] or None,
+                            ffmpeg_params=x264_params(encode_profile, Config.VIDEO_FPS),
+                            audio=audio_path or False,
+                            verbose=False,
+                            logger=None
+                        )
+                    encode_span['bytes_written'] = os.path.getsize(render_path)
+                self.record_encode(encode_profile['name'], time.monotonic() - started, render_path)
+                
+                if cache_key:
+                    render_path = self.render_cache.put(cache_key, render_path)
+                    if output_path:
+                        render_path = self.render_cache.export(cache_key, output_path)
+                elif Config.RENDER_SCRATCH_DIR:
+                    destination = output_path or f"{Config.TEMP_DIR}/generated_video_{uuid.uuid4().hex}.mp4"
+                    render_path = shutil.move(render_path, destination)
+                
+                self.logger.info(f"Video generated successfully: {render_path}")
+                return render_path
             
-            # Set video properties
-            video = video.set_fps(Config.VIDEO_FPS)
+            except Exception as e:
+                self.logger.error(f"Error generating video: {str(e)}")
+                # Drop a partial render so it never lingers in the cache or scratch directory
+                if render_path and os.path.basename(render_path).startswith('tmp_') and os.path.exists(render_path):
+                    os.remove(render_path)
+                raise
+    
+    def stream_video(self, video_data: dict, output_stream, profile: str = None, layout: str = None):
+        """Write a video to a writable binary stream (stdout, a socket, an upload body) instead of a file"""
+        with self.metrics.span('render', profile=profile or Config.DEFAULT_ENCODE_PROFILE,
+                               layout=layout or Config.DEFAULT_LAYOUT, streamed=True) as span:
+            encode_profile = get_encode_profile(profile)
+            template = get_layout_template(layout)
             
-            # Output path
-            output_path = f"{Config.TEMP_DIR}/generated_video_{random.randint(1000, 9999)}.mp4"
+            cache_key = None
+            if self.render_cache is not None:
+                cache_key = self.render_cache.make_key(self.render_inputs(video_data, encode_profile, template))
+                cached_path = self.render_cache.get(cache_key)
+                span['cache_hit'] = bool(cached_path)
+                if cached_path:
+                    self.metrics.inc('render_cache_hits_total')
+                    with open(cached_path, 'rb') as f:
+                        shutil.copyfileobj(f, output_stream, 1024 * 1024)
+                    return
             
-            # Write video file
-            video.write_videofile(
-                output_path,
-                codec='libx264',
-                audio_codec='aac',
-                temp_audiofile=f"{Config.TEMP_DIR}/temp_audio.m4a",
-                remove_temp=True,
-                verbose=False,
-                logger=None
-            )
+            effects = self.resolve_effects(video_data)
+            if effects:
+                # Animated frames are produced in memory too, so they stream the same way
+                with self.metrics.span('encode', profile=encode_profile['name'], path='stream',
+                                       effects=','.join(effects)):
+                    self.write_animated_video(video_data, template, effects, None,
+                                              self.get_audio_path(video_data), encode_profile, output_stream)
+                return
             
-            # Clean up temporary files
-            for temp_file in [bg_path, text_path]:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
+            video, audio_path = self.compose_video(video_data, template)
+            if not (Config.STATIC_FAST_PATH and self.is_static_clip(video)):
+                # MoviePy needs a seekable file; render normally and copy the result out
+                path = self.generate_video(video_data, profile=profile, layout=layout)
+                try:
+                    with open(path, 'rb') as f:
+                        shutil.copyfileobj(f, output_stream, 1024 * 1024)
+                finally:
+                    if not self.is_cached_output(path):
+                        os.remove(path)
+                return
             
-            self.logger.info(f"Video generated successfully: {output_path}")
-            return output_path
+            # The frame goes from memory to FFmpeg and the fragmented MP4 straight to the stream
+            with self.metrics.span('encode', profile=encode_profile['name'], path='stream'):
+                self.write_static_video(video, None, audio_path, encode_profile, output_stream)
+    
+    def generate_variants(self, video_data: dict, layouts: list = None, output_dir: str = None,
+                          profile: str = None) -> dict:
+        """Render one quote in several layouts, sharing the music bed and encoding the variants concurrently"""
+        layouts = list(dict.fromkeys(layouts or Config.LAYOUT_TEMPLATES))
+        for layout in layouts:
+            get_layout_template(layout)
+        output_dir = output_dir or Config.TEMP_DIR
+        os.makedirs(output_dir, exist_ok=True)
+        
+        # Encode the music bed once up front so the variants stream-copy the same file
+        music_file = video_data['music']['music_file']
+        if music_file and os.path.exists(music_file):
+            self.get_music_bed(music_file, Config.VIDEO_DURATION, Config.MUSIC_VOLUME)
+        
+        # Each variant is mostly an FFmpeg subprocess, so threads overlap well
+        variant_id = uuid.uuid4().hex[:8]
+        with ThreadPoolExecutor(max_workers=len(layouts), thread_name_prefix='variant') as executor:
+            futures = {
+                layout: executor.submit(
+                    self.generate_video, video_data,
+                    os.path.join(output_dir, f"variant_{variant_id}_{layout}.mp4"), profile, layout
+                )
+                for layout in layouts
+            }
+            results = {layout: future.result() for layout, future in futures.items()}
+        
+        self.logger.info(f"Rendered {len(results)} layout variants: {', '.join(layouts)}")
+        return results
+    
+    def generate_batch(self, rows: list, workers: int = None, output_dir: str = None, profile: str = None) -> list:
+        """Render many videos in parallel, returning output paths in input order"""
+        workers = workers or Config.RENDER_WORKERS
+        output_dir = output_dir or Config.TEMP_DIR
+        os.makedirs(output_dir, exist_ok=True)
         
-        except Exception as e:
-            self.logger.error(f"Error generating video: {str(e)}")
-            raise
+        batch_id = uuid.uuid4().hex[:8]
+        jobs = [
+            (video_data, os.path.join(output_dir, f"batch_{batch_id}_{position:05d}.mp4"), profile)
+            for position, video_data in enumerate(rows)
+        ]
+        
+        self.logger.info(f"Rendering batch {batch_id}: {len(jobs)} videos on {workers} workers")
+        results = [None] * len(jobs)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(render_video_job, job) for job in jobs]
+            for position, future in enumerate(futures):
+                try:
+                    results[position], worker_metrics = future.result()
+                    self.metrics.merge(worker_metrics)
+                except Exception as e:
+                    self.logger.error(f"Error rendering batch item {position}: {str(e)}")
+        
+        rendered = sum(1 for path in results if path)
+        self.logger.info(f"Batch {batch_id} finished: {rendered}/{len(jobs)} videos rendered")
+        return results
+
+
+def render_video_job(job: tuple) -> tuple:
+    """Render one batch item inside a worker process, returning (path, metrics snapshot)"""
+    global _worker_generator
+    metrics = get_metrics()
+    if _worker_generator is None:
+        # Drop values inherited from the parent on fork so they are not reported twice
+        metrics.snapshot(reset=True)
+        _worker_generator = VideoGenerator()
+    video_data, output_path, profile = job
+    # A failed render's metrics travel back with this worker's next successful job
+    return _worker_generator.generate_video(video_data, output_path, profile), metrics.snapshot(reset=True)
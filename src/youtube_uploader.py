@@ -1,53 +1,98 @@
 import os
+import math
 import pickle
-from googleapiclient.discovery import build
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.http import MediaFileUpload
+from datetime import datetime, timezone
+from src.resumable_upload import ResumableUpload
+from src.instrumentation import get_logger, get_metrics
 from config.settings import Config
-import logging
+
+TOKEN_FILE = 'config/token.pickle'
+
+
+def load_credentials():
+    """Load saved OAuth credentials, refreshing or re-running the consent flow if needed"""
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+    creds = None
+
+    # Load existing credentials
+    if os.path.exists(TOKEN_FILE):
+        with open(TOKEN_FILE, 'rb') as token:
+            creds = pickle.load(token)
+
+    # If no valid credentials, get new ones
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            creds.refresh(Request())
+        else:
+            flow = InstalledAppFlow.from_client_secrets_file(
+                Config.YOUTUBE_CLIENT_SECRET_FILE, Config.YOUTUBE_UPLOAD_SCOPE)
+            creds = flow.run_local_server(port=0)
+
+        # Save credentials for next run
+        with open(TOKEN_FILE, 'wb') as token:
+            pickle.dump(creds, token)
+
+    return creds
+
+
+def parse_publish_time(value) -> datetime:
+    """Parse a scheduled_time value into an aware UTC datetime, or None if empty"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if str(value).strip() in ('', 'NaT'):
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        # Naive times are treated as UTC, as the Streamlit app does
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def format_publish_time(value) -> str:
+    """Format a scheduled_time value as an RFC 3339 UTC timestamp, or None if empty"""
+    value = parse_publish_time(value)
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ') if value else None
+
+
+def future_publish_time(value, now: datetime = None) -> str:
+    """Like format_publish_time, but None unless the time is still ahead; YouTube rejects a past publishAt"""
+    value = parse_publish_time(value)
+    if value is None or value <= (now or datetime.now(timezone.utc)):
+        return None
+    return format_publish_time(value)
+
 
 class YouTubeUploader:
-    def __init__(self):
+    def __init__(self, credentials=None):
         self.setup_logging()
+        self.metrics = get_metrics()
         self.youtube = None
+        self.session = None
+        self.credentials = credentials
     
     def setup_logging(self):
-        logging.basicConfig(
-            filename=f'{Config.LOGS_DIR}/youtube_uploader.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
-        self.logger = logging.getLogger(__name__)
+        self.logger = get_logger(__name__, 'youtube_uploader.log')
     
     def authenticate(self):
         """Authenticate with YouTube API"""
-        creds = None
-        token_file = 'config/token.pickle'  # Define token path
-
-    # Load existing credentials
-        if os.path.exists(token_file):
-            with open(token_file, 'rb') as token:
-                creds = pickle.load(token)
-
-    # If no valid credentials, get new ones
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    Config.YOUTUBE_CLIENT_SECRET_FILE, Config.YOUTUBE_UPLOAD_SCOPE)
-                creds = flow.run_local_server(port=0)
-
-        # Save credentials for next run
-            with open(token_file, 'wb') as token:
-                pickle.dump(creds, token)
-
-        self.youtube = build(Config.YOUTUBE_API_SERVICE_NAME, Config.YOUTUBE_API_VERSION, credentials=creds)
+        from googleapiclient.discovery import build
+        from google.auth.transport.requests import AuthorizedSession
+        from requests.adapters import HTTPAdapter
+        if self.credentials is None:
+            self.credentials = load_credentials()
+        
+        # One API client and one pooled HTTP session per uploader; neither is shared across threads
+        self.youtube = build(Config.YOUTUBE_API_SERVICE_NAME, Config.YOUTUBE_API_VERSION, credentials=self.credentials)
+        self.session = AuthorizedSession(self.credentials)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=Config.UPLOAD_POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.logger.info("YouTube API authenticated successfully")
 
-    def upload_video(self, video_path: str, video_data: dict) -> str:
-        """Upload video to YouTube"""
+    def upload_video(self, video_path: str, video_data: dict, publish_at=None) -> str:
+        """Upload video to YouTube, scheduling it in the same call when a publish time is set"""
         if not self.youtube:
             self.authenticate()
         
@@ -69,44 +114,111 @@ class YouTubeUploader:
                 }
             }
             
-            # Create media upload object
-            media = MediaFileUpload(video_path, chunksize=-1, resumable=True)
+            requested = publish_at or video_data['quote'].get('scheduled_time')
+            publish_time = future_publish_time(requested)
+            if publish_time:
+                body['status']['publishAt'] = publish_time
+            elif format_publish_time(requested):
+                self.logger.warning(
+                    f"Publish time {format_publish_time(requested)} has passed; uploading as private without a schedule"
+                )
             
-            # Execute upload
-            insert_request = self.youtube.videos().insert(
+            # Chunked resumable upload with retries; progress survives restarts
+            upload = ResumableUpload(
+                self.session,
+                video_path,
+                body,
                 part=','.join(body.keys()),
-                body=body,
-                media_body=media
+                progress_callback=self._log_progress
             )
             
-            response = insert_request.execute()
+            with self.metrics.span('upload', scheduled=bool(publish_time)) as span:
+                response = upload.execute()
+                span['video_id'] = response['id']
+                span['bytes_uploaded'] = upload.bytes_sent
+                span['file_bytes'] = upload.total_size
             video_id = response['id']
             
-            self.logger.info(f"Video uploaded successfully. Video ID: {video_id}")
+            if publish_time:
+                self.logger.info(f"Video uploaded successfully. Video ID: {video_id}, scheduled for {publish_time}")
+            else:
+                self.logger.info(f"Video uploaded successfully. Video ID: {video_id}")
             return video_id
         
         except Exception as e:
             self.logger.error(f"Error uploading video: {str(e)}")
             raise
     
+    def _log_progress(self, uploaded: int, total: int):
+        self.logger.info(f"Uploaded {uploaded}/{total} bytes ({100 * uploaded // max(total, 1)}%)")
+    
     def schedule_video(self, video_id: str, publish_time: str):
         """Schedule video for publishing"""
+        if not self.youtube:
+            self.authenticate()
+        
         try:
+            publish_time = format_publish_time(publish_time)
+            
             # Update video to be scheduled
-            self.youtube.videos().update(
-                part='status',
-                body={
-                    'id': video_id,
-                    'status': {
-                        'privacyStatus': 'private',
-                        'publishAt': publish_time,
-                        'selfDeclaredMadeForKids': False
-                    }
-                }
-            ).execute()
+            with self.metrics.span('schedule', video_id=video_id, publish_at=publish_time):
+                self.youtube.videos().update(
+                    part='status',
+                    body=self._schedule_body(video_id, publish_time)
+                ).execute()
             
             self.logger.info(f"Video {video_id} scheduled for {publish_time}")
         
         except Exception as e:
             self.logger.error(f"Error scheduling video: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    def _schedule_body(self, video_id: str, publish_time: str) -> dict:
+        return {
+            'id': video_id,
+            'status': {
+                'privacyStatus': 'private',
+                'publishAt': publish_time,
+                'selfDeclaredMadeForKids': False
+            }
+        }
+    
+    def batch_update_videos(self, updates: list, part: str) -> dict:
+        """Apply many videos().update bodies through batched HTTP requests; returns errors by video ID"""
+        if not self.youtube:
+            self.authenticate()
+        
+        errors = {}
+        
+        def callback(request_id, response, exception):
+            if exception is not None:
+                errors[request_id] = str(exception)
+                self.logger.error(f"Batch update failed for video {request_id}: {str(exception)}")
+        
+        with self.metrics.span('schedule', part=part, videos=len(updates)) as span:
+            for start in range(0, len(updates), Config.BATCH_REQUEST_SIZE):
+                batch = self.youtube.new_batch_http_request(callback=callback)
+                for body in updates[start:start + Config.BATCH_REQUEST_SIZE]:
+                    batch.add(self.youtube.videos().update(part=part, body=body), request_id=body['id'])
+                batch.execute()
+            span['failed'] = len(errors)
+        
+        self.logger.info(f"Batch updated {len(updates) - len(errors)}/{len(updates)} videos ({part})")
+        return errors
+    
+    def reschedule_videos(self, publish_times: dict) -> dict:
+        """Set new publish times for many uploaded videos, keyed by video ID"""
+        updates = [
+            self._schedule_body(video_id, format_publish_time(publish_time))
+            for video_id, publish_time in publish_times.items()
+        ]
+        return self.batch_update_videos(updates, 'status')
+    
+    def retitle_videos(self, snippets: dict) -> dict:
+        """Replace title, description and tags of many uploaded videos, keyed by video ID"""
+        updates = []
+        for video_id, snippet in snippets.items():
+            snippet = dict(snippet)
+            snippet.setdefault('categoryId', '22')  # update requires the category
+            updates.append({'id': video_id, 'snippet': snippet})
+        return self.batch_update_videos(updates, 'snippet')
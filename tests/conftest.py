@@ -0,0 +1,31 @@
+import os
+import sys
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'benchmarks'))
+
+from config.settings import Config
+
+WORKSPACE_PATHS = {
+    'TEMP_DIR': 'temp',
+    'CACHE_DIR': 'cache',
+    'RENDER_CACHE_DIR': 'cache/renders',
+    'UPLOAD_STATE_DIR': 'cache/uploads',
+    'LOGS_DIR': 'logs',
+    'JOB_STORE_PATH': 'data/jobs.db',
+    'EXCEL_FILE_PATH': 'data/video_data.xlsx',
+    'RENDER_OUTPUT_DIR': 'data/rendered',
+}
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Run a test in a scratch directory with every configured path inside it"""
+    monkeypatch.chdir(tmp_path)
+    for name, relative_path in WORKSPACE_PATHS.items():
+        monkeypatch.setattr(Config, name, str(tmp_path / relative_path))
+    Config.ensure_directories()
+    os.makedirs(tmp_path / 'data', exist_ok=True)
+    return tmp_path
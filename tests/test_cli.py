@@ -0,0 +1,97 @@
+import json
+from concurrent.futures import Future
+import pytest
+import main
+from config.settings import Config
+from src.job_store import JobStore, UPLOADED, SCHEDULED
+from src.render_worker import sidecar_path, sidecar_record, video_path_for, write_sidecar
+from src.upload_service import UploadService
+
+
+@pytest.fixture
+def rendered_dir(workspace):
+    """Two rows as the render command leaves them; row 1 has a publish time"""
+    out = workspace / 'rendered'
+    out.mkdir(exist_ok=True)
+    for row_index, scheduled_time in ((0, None), (1, '2030-01-01T09:00:00Z')):
+        video_path = video_path_for(str(out), row_index)
+        with open(video_path, 'wb') as f:
+            f.write(b'video')
+        video_data = {'quote': {'text': f'quote {row_index}', 'scheduled_time': scheduled_time}}
+        write_sidecar(sidecar_path(video_path), sidecar_record(row_index, video_path, video_data))
+    return out
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    uploaded = []
+
+    def submit(self, video_path, video_data):
+        uploaded.append(video_path)
+        future = Future()
+        future.set_result(f"video-{len(uploaded)}")
+        return future
+    monkeypatch.setattr(UploadService, 'submit', submit)
+    return uploaded
+
+
+def run_upload(directory):
+    args = main.build_parser().parse_args(['upload', '--dir', str(directory), '--keep'])
+    return main.cmd_upload(args, main.setup_main_logging())
+
+
+def read_sidecar(directory, row_index):
+    with open(sidecar_path(video_path_for(str(directory), row_index))) as f:
+        return json.load(f)
+
+
+def test_upload_records_results_in_the_job_store(rendered_dir, uploads):
+    assert run_upload(rendered_dir) == 0
+    job_store = JobStore()
+    assert job_store.get_job(0)['state'] == UPLOADED
+    assert job_store.get_job(1)['state'] == SCHEDULED
+    assert job_store.get_job(0)['video_id'] == read_sidecar(rendered_dir, 0)['video_id']
+    # Neither a worker nor a scheduled render picks the rows up again
+    assert job_store.claim_next() is None
+    assert job_store.claim_row(1) is None
+
+
+def test_upload_skips_rows_a_worker_already_uploaded(rendered_dir, uploads):
+    job_store = JobStore(worker_id='worker')
+    job_store.claim_row(0)
+    job_store.mark_uploaded(0, 'from-worker')
+    job_store.claim_row(1)  # still being processed
+
+    assert run_upload(rendered_dir) == 0
+    assert uploads == []
+    assert read_sidecar(rendered_dir, 0)['video_id'] == 'from-worker'
+    assert read_sidecar(rendered_dir, 1)['video_id'] is None
+
+
+def test_rerun_retries_a_failed_upload(rendered_dir, uploads, monkeypatch):
+    succeed = UploadService.submit
+
+    def fail(self, video_path, video_data):
+        future = Future()
+        future.set_exception(ConnectionError('network down'))
+        return future
+    monkeypatch.setattr(UploadService, 'submit', fail)
+    assert run_upload(rendered_dir) == 1
+    job = JobStore().get_job(0)
+    assert job['output_path'] == video_path_for(str(rendered_dir), 0)
+
+    monkeypatch.setattr(UploadService, 'submit', succeed)
+    assert run_upload(rendered_dir) == 0
+    assert len(uploads) == 2
+    assert read_sidecar(rendered_dir, 0)['video_id']
+
+
+def test_row_out_of_attempts_is_reported_as_failed(rendered_dir, uploads, monkeypatch, capsys):
+    monkeypatch.setattr(Config, 'JOB_MAX_ATTEMPTS', 1)
+    job_store = JobStore()
+    job_store.claim_row(0)
+    job_store.mark_failed(0, 'network down')
+
+    assert run_upload(rendered_dir) == 1
+    assert 'Failed row_00000.mp4 after 1 attempts: network down' in capsys.readouterr().out
+    assert len(uploads) == 1
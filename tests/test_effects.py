@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from src.effects import QuoteAnimation
+
+EFFECTS = {
+    'fade_in': {'duration': 0.5},
+    'zoom': {'duration': 1.0, 'scale': 1.1},
+    'typewriter': {'duration': 0.8},
+}
+FPS = 10
+
+
+@pytest.fixture
+def animation():
+    """Small frame with one opaque white text block on a grey background"""
+    background = np.full((40, 64, 3), 50, dtype=np.uint8)
+    overlay = np.zeros((40, 64, 4), dtype=np.uint8)
+    overlay[10:30, 8:56] = (255, 255, 255, 255)
+    return QuoteAnimation(background, overlay, EFFECTS, line_count=2, char_count=12, opacity=1.0)
+
+
+def test_state_settles_once_the_longest_effect_ends(animation):
+    assert animation.state(0) == (64, 0, 0)
+    final = animation.state(1.0)
+    assert final == (64 - 2 * round((64 - 64 / 1.1) / 2), 255, 12)
+    assert animation.state(1.5) == animation.state(60) == final
+
+
+def test_frames_stop_at_the_settled_frame(animation):
+    frames = list(animation.frames(FPS))
+    assert len(frames) == 1 * FPS + 1
+    assert np.array_equal(frames[-1], animation.render(animation.state(1.0)))
+    # Fully faded in and revealed: the text block is white
+    assert (frames[-1][20, 32] == 255).all()
+
+
+def test_unchanged_states_reuse_the_previous_frame(animation):
+    states = [animation.state(index / FPS) for index in range(FPS + 1)]
+    frames = list(animation.frames(FPS))
+    for index in range(1, len(frames)):
+        assert (frames[index] is frames[index - 1]) == (states[index] == states[index - 1])
+
+
+def test_without_effects_a_single_frame_is_rendered():
+    background = np.zeros((8, 8, 3), dtype=np.uint8)
+    overlay = np.zeros((8, 8, 4), dtype=np.uint8)
+    frames = list(QuoteAnimation(background, overlay, {}).frames(FPS))
+    assert len(frames) == 1
+    assert np.array_equal(frames[0], background)
@@ -0,0 +1,49 @@
+import time
+from datetime import date, datetime, time as time_of_day, timedelta
+import pytest
+from src.event_scheduler import EventScheduler, ScheduledJob, local_slot
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    """Local time zone with DST; it starts 2026-03-08 and ends 2026-11-01"""
+    monkeypatch.setenv('TZ', 'America/New_York')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def daily_job(day: date, lead: timedelta = timedelta(0)) -> ScheduledJob:
+    slot = local_slot(day, time_of_day(9, 0))
+    return ScheduledJob(print, slot - lead, slot=slot, daily=True, lead=lead)
+
+
+@pytest.mark.parametrize('day, offset_before, offset_after', [
+    (date(2026, 3, 7), -5, -4),
+    (date(2026, 10, 31), -4, -5),
+])
+def test_daily_slot_keeps_local_time_across_dst(new_york, day, offset_before, offset_after):
+    job = daily_job(day, lead=timedelta(minutes=30))
+    assert job.slot.utcoffset() == timedelta(hours=offset_before)
+    job.advance()
+    assert job.slot.date() == day + timedelta(days=1)
+    assert (job.slot.hour, job.slot.minute) == (9, 0)
+    assert job.slot.utcoffset() == timedelta(hours=offset_after)
+    assert job.run_at == job.slot - timedelta(minutes=30)
+
+
+def test_daily_slot_in_the_spring_forward_gap_returns_to_its_time(new_york):
+    slot = local_slot(date(2026, 3, 8), time_of_day(2, 30))
+    job = ScheduledJob(print, slot, slot=slot, daily=True, at=time_of_day(2, 30))
+    job.advance()
+    assert (job.slot.hour, job.slot.minute) == (2, 30)
+
+
+def test_add_daily_schedules_the_next_local_slot(new_york, workspace):
+    job = EventScheduler(workers=1).add_daily('09:00', print, lead_minutes=10)
+    now = datetime.now().astimezone()
+    assert job.run_at > now
+    assert job.run_at - now <= timedelta(days=1)
+    assert (job.slot.hour, job.slot.minute) == (9, 0)
+    assert job.slot - job.run_at == timedelta(minutes=10)
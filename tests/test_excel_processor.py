@@ -0,0 +1,90 @@
+import os
+import pytest
+from openpyxl import Workbook
+from config.settings import Config
+from src.excel_processor import ExcelProcessor
+
+QUOTE_COLUMNS = ExcelProcessor.REQUIRED_QUOTE_COLUMNS
+
+
+def write_workbook(path, quotes):
+    """Workbook with one quote per entry; None leaves a blank sheet row"""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = Config.QUOTES_SHEET
+    sheet.append(QUOTE_COLUMNS)
+    for quote in quotes:
+        if quote is None:
+            sheet.append([None] * len(QUOTE_COLUMNS))
+        else:
+            sheet.append([quote, f'title {quote}', 'description', 'tag', None])
+    music = workbook.create_sheet(Config.MUSIC_SHEET)
+    music.append(ExcelProcessor.REQUIRED_MUSIC_COLUMNS)
+    music.append(['track.mp3', 60, 'calm'])
+    workbook.save(path)
+
+
+@pytest.fixture
+def workbook(workspace):
+    write_workbook(Config.EXCEL_FILE_PATH, ['a', None, 'b', 'c'])
+    return Config.EXCEL_FILE_PATH
+
+
+def test_streamed_rows_keep_sheet_numbering_across_blank_rows(workbook):
+    processor = ExcelProcessor()
+    streamed = [pair for chunk in processor.iter_records(chunk_size=2, with_index=True) for pair in chunk]
+    assert [(row_index, record['quote']) for row_index, record in streamed] == [(0, 'a'), (2, 'b'), (3, 'c')]
+    for row_index, record in streamed:
+        assert processor.get_quote(row_index)['quote'] == record['quote']
+
+
+def test_blank_rows_are_not_emitted(workbook):
+    records = [record for chunk in ExcelProcessor().iter_records() for record in chunk]
+    assert [record['quote'] for record in records] == ['a', 'b', 'c']
+
+
+@pytest.fixture
+def parses(workbook, monkeypatch):
+    """Count workbook parses and content hashes done by load_index"""
+    calls = {'build': 0, 'hash': 0}
+    build, hash_file = ExcelProcessor._build_index, ExcelProcessor._hash_file
+
+    def counting(name, method):
+        def wrapper(self):
+            calls[name] += 1
+            return method(self)
+        return wrapper
+    monkeypatch.setattr(ExcelProcessor, '_build_index', counting('build', build))
+    monkeypatch.setattr(ExcelProcessor, '_hash_file', counting('hash', hash_file))
+    return calls
+
+
+def test_index_cache_is_used_while_the_file_stat_matches(workbook, parses):
+    assert ExcelProcessor().load_index()['quotes']['quote'][0] == 'a'
+    assert parses == {'build': 1, 'hash': 1}
+    processor = ExcelProcessor()
+    assert processor.load_index()['quote_count'] == 4
+    processor.load_index()
+    assert parses == {'build': 1, 'hash': 1}
+
+
+def test_touched_but_unchanged_workbook_is_not_parsed_again(workbook, parses):
+    ExcelProcessor().load_index()
+    stat = os.stat(workbook)
+    os.utime(workbook, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert ExcelProcessor().load_index()['quote_count'] == 4
+    assert parses == {'build': 1, 'hash': 2}
+    # The refreshed stat is cached, so the next load skips the hash too
+    ExcelProcessor().load_index()
+    assert parses == {'build': 1, 'hash': 2}
+
+
+def test_changed_workbook_is_parsed_again(workbook, parses):
+    processor = ExcelProcessor()
+    processor.load_index()
+    stat = os.stat(workbook)
+    write_workbook(workbook, ['x', 'y'])
+    os.utime(workbook, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    index = processor.load_index()
+    assert index['quotes']['quote'] == ['x', 'y']
+    assert parses == {'build': 2, 'hash': 2}
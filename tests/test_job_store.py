@@ -0,0 +1,106 @@
+import time
+import pytest
+from config.settings import Config
+from src.job_store import JobStore, PENDING, RENDERED, UPLOADED, SCHEDULED, FAILED
+
+
+@pytest.fixture
+def stores(workspace):
+    """Two workers sharing one job store, as two scheduler processes would"""
+    return JobStore(worker_id='worker-a'), JobStore(worker_id='worker-b')
+
+
+def test_claim_next_hands_each_row_to_one_worker(stores):
+    a, b = stores
+    a.enqueue_rows(range(2))
+    first, second = a.claim_next(), b.claim_next()
+    assert {first['row_index'], second['row_index']} == {0, 1}
+    assert a.claim_next() is None
+    assert b.claim_row(first['row_index']) is None
+
+
+def test_expired_claim_can_be_taken_over(stores, monkeypatch):
+    a, b = stores
+    a.enqueue_rows([0])
+    assert a.claim_next()['claimed_by'] == 'worker-a'
+    monkeypatch.setattr(Config, 'JOB_LEASE_SECONDS', 0)
+    time.sleep(0.01)
+    job = b.claim_next()
+    assert job['claimed_by'] == 'worker-b'
+    assert job['attempts'] == 2
+
+
+def test_release_frees_the_row_without_changing_state(stores):
+    a, b = stores
+    a.enqueue_rows([0])
+    a.claim_next()
+    a.mark_rendered(0, 'row_0.mp4')
+    a.release(0)
+    assert b.claim_next()['state'] == RENDERED
+
+
+@pytest.mark.parametrize('finish', ['mark_uploaded', 'mark_scheduled'])
+def test_finished_rows_are_not_claimed_again(stores, finish):
+    a, b = stores
+    a.claim_row(0)
+    getattr(a, finish)(0, 'video-id')
+    assert b.claim_next() is None
+    assert b.claim_row(0) is None
+    assert b.get_job(0)['state'] in (UPLOADED, SCHEDULED)
+
+
+def test_force_claims_a_finished_row(stores):
+    a, b = stores
+    a.claim_row(0)
+    a.mark_uploaded(0, 'video-id')
+    job = b.claim_row(0, force=True)
+    assert job['state'] == UPLOADED
+    assert job['claimed_by'] == 'worker-b'
+    # force does not take a row away from a live claim
+    assert a.claim_row(0, force=True) is None
+
+
+def test_failed_upload_is_retried_without_rendering_again(stores):
+    a, b = stores
+    a.claim_row(0)
+    a.mark_rendered(0, 'row_0.mp4')
+    a.mark_failed(0, 'upload failed')
+    job = b.claim_next()
+    assert job['state'] == RENDERED
+    assert job['output_path'] == 'row_0.mp4'
+
+
+def test_failed_render_is_retried_from_pending(stores):
+    a, b = stores
+    a.claim_row(0)
+    a.mark_failed(0, 'render failed')
+    assert b.claim_next()['state'] == PENDING
+
+
+def test_failed_row_stays_failed_after_max_attempts(stores, monkeypatch):
+    monkeypatch.setattr(Config, 'JOB_MAX_ATTEMPTS', 2)
+    a, _ = stores
+    a.enqueue_rows([0])
+    for _ in range(2):
+        assert a.claim_next() is not None
+        a.mark_failed(0, 'render failed')
+    assert a.claim_next() is None
+    assert a.claim_row(0) is None
+    assert a.get_job(0)['state'] == FAILED
+    assert a.get_job(0)['attempts'] == 2
+
+
+def test_worker_whose_lease_expired_cannot_overwrite_the_row(stores, monkeypatch):
+    a, b = stores
+    a.claim_row(0)
+    monkeypatch.setattr(Config, 'JOB_LEASE_SECONDS', 0)
+    time.sleep(0.01)
+    assert b.claim_row(0)['claimed_by'] == 'worker-b'
+    assert b.mark_scheduled(0, 'vid-b')
+
+    assert not a.mark_failed(0, 'lease expired')
+    assert not a.mark_rendered(0, 'row_0.mp4')
+    assert not a.release(0)
+    job = a.get_job(0)
+    assert (job['state'], job['video_id']) == (SCHEDULED, 'vid-b')
+    assert a.claim_next() is None
@@ -0,0 +1,75 @@
+import os
+import pytest
+from config.settings import Config
+from src import music_index as music_index_module
+from src.music_index import MusicIndex
+
+# Probed length of each track file
+DURATIONS = {'calm_long.mp3': 90, 'calm_short.mp3': 30, 'rock_long.mp3': 120, 'rock_other.mp3': 75}
+
+
+@pytest.fixture
+def probes(workspace, monkeypatch):
+    """Track files on disk with a fake probe that records every file it decodes"""
+    probed = []
+
+    def probe_audio(path):
+        probed.append(path)
+        name = os.path.basename(path)
+        return {'duration': DURATIONS[name], 'sample_rate': 44100, 'loudness': -14.0}
+    monkeypatch.setattr(music_index_module, 'probe_audio', probe_audio)
+    for name in DURATIONS:
+        (workspace / name).write_bytes(b'audio')
+    return probed
+
+
+def row(music_file, genre):
+    return {'music_file': music_file, 'genre': genre, 'duration': 600}
+
+
+ROWS = [
+    row('calm_long.mp3', 'Calm'),
+    row('calm_short.mp3', 'calm'),
+    row('rock_long.mp3', 'Rock'),
+    row('rock_other.mp3', 'rock'),
+    row('missing.mp3', 'calm'),
+]
+
+
+def names(pool):
+    return sorted(track['row']['music_file'] for track in pool)
+
+
+def test_pool_narrows_by_availability_genre_and_length(probes):
+    index = MusicIndex(ROWS)
+    assert names(index._pool('calm', 60)) == ['calm_long.mp3']
+    assert names(index._pool('rock', 60)) == ['rock_long.mp3', 'rock_other.mp3']
+    assert names(index._pool('rock', 100)) == ['rock_long.mp3']
+    assert names(index._pool('', 100)) == ['rock_long.mp3']
+
+
+def test_rules_nobody_satisfies_are_skipped(probes):
+    index = MusicIndex(ROWS)
+    # No jazz and nothing that long: the other rules still apply
+    assert names(index._pool('jazz', 60)) == ['calm_long.mp3', 'rock_long.mp3', 'rock_other.mp3']
+    assert names(index._pool('calm', 1000)) == ['calm_long.mp3', 'calm_short.mp3']
+
+
+def test_recent_tracks_are_not_repeated_while_others_qualify(probes, monkeypatch):
+    monkeypatch.setattr(Config, 'MUSIC_NO_REPEAT_WINDOW', 1)
+    index = MusicIndex(ROWS)
+    picks = [index.select('rock', 60)['music_file'] for _ in range(6)]
+    assert all(first != second for first, second in zip(picks, picks[1:]))
+    # A pool of one repeats its only track
+    assert {index.select('calm', 60)['music_file'] for _ in range(3)} == {'calm_long.mp3'}
+
+
+def test_probe_results_are_reused_until_a_file_changes(probes, workspace):
+    MusicIndex(ROWS)
+    assert len(probes) == 4
+    MusicIndex(ROWS)
+    assert len(probes) == 4
+
+    (workspace / 'rock_other.mp3').write_bytes(b'new audio')
+    MusicIndex(ROWS)
+    assert probes[4:] == [str(workspace / 'rock_other.mp3')]
@@ -0,0 +1,68 @@
+import os
+import pytest
+from config.settings import Config
+from src import pipeline as pipeline_module
+from src.job_store import JobStore, UPLOADED, SCHEDULED, FAILED
+from src.pipeline import VideoPipeline
+
+
+def fake_render(job):
+    """Stands in for render_video_job in the render processes"""
+    video_data, output_path, _ = job
+    with open(output_path, 'wb') as f:
+        f.write(video_data['quote']['quote'].encode())
+    return output_path, None
+
+
+class FakeExcel:
+    def get_video_data(self, row_index):
+        scheduled_time = '2030-01-01T09:00:00Z' if row_index == 2 else None
+        return {'quote': {'quote': f'quote {row_index}', 'scheduled_time': scheduled_time}}
+
+
+class FakeUploadService:
+    def __init__(self, fail_rows=()):
+        self.uploaded = []
+        self.fail_rows = fail_rows
+
+    def upload_video(self, video_path, video_data, publish_at=None):
+        if video_data['quote']['quote'] in self.fail_rows:
+            raise ConnectionError('network down')
+        self.uploaded.append(video_data['quote']['quote'])
+        return f"video-{len(self.uploaded)}"
+
+
+@pytest.fixture
+def run(workspace, monkeypatch):
+    monkeypatch.setattr(pipeline_module, 'render_video_job', fake_render)
+
+    def run(rows, upload_service):
+        pipeline = VideoPipeline(FakeExcel(), render_workers=1, upload_workers=1, upload_service=upload_service)
+        return pipeline.run(rows)
+    return run
+
+
+def test_pipeline_records_results_and_skips_finished_rows(run):
+    job_store = JobStore(worker_id='worker')
+    job_store.claim_row(1)
+    job_store.mark_scheduled(1, 'from-worker')
+
+    service = FakeUploadService()
+    results = run([0, 1, 2], service)
+    assert service.uploaded == ['quote 0', 'quote 2']
+    assert results[1] == {'row': 1, 'video_id': 'from-worker', 'error': None, 'skipped': True}
+    assert [job_store.get_job(row)['state'] for row in range(3)] == [UPLOADED, SCHEDULED, SCHEDULED]
+    assert not os.listdir(Config.TEMP_DIR)
+
+    # A second run uploads nothing again
+    assert all(result['skipped'] for result in run([0, 1, 2], service))
+    assert len(service.uploaded) == 2
+
+
+def test_failed_upload_is_retried_on_the_next_run(run):
+    assert run([0], FakeUploadService(fail_rows=['quote 0']))[0]['error'] == 'network down'
+    assert JobStore().get_job(0)['state'] == FAILED
+
+    service = FakeUploadService()
+    assert run([0], service)[0]['video_id'] == 'video-1'
+    assert JobStore().get_job(0)['state'] == UPLOADED
@@ -0,0 +1,92 @@
+import os
+import time
+import pytest
+from src.render_broker import LocalBroker, DirectoryBroker, PENDING, CLAIMED, DONE, FAILED
+from src.render_worker import RenderWorker
+
+TIMEOUT = 0.2
+
+
+@pytest.fixture(params=['local', 'directory'])
+def broker(request, workspace):
+    if request.param == 'local':
+        return LocalBroker(visibility_timeout=TIMEOUT, max_attempts=2)
+    return DirectoryBroker(str(workspace / 'queue'), visibility_timeout=TIMEOUT, max_attempts=2)
+
+
+def expire(broker) -> int:
+    time.sleep(TIMEOUT * 1.5)
+    return broker.requeue_expired()
+
+
+def test_heartbeat_keeps_a_claim(broker):
+    broker.submit({'row_index': 0})
+    job = broker.claim('a')
+    time.sleep(TIMEOUT * 0.75)
+    assert broker.heartbeat(job)
+    time.sleep(TIMEOUT * 0.75)
+    assert broker.requeue_expired() == 0
+    assert broker.counts()[CLAIMED] == 1
+
+
+def test_expired_claim_is_handed_out_again(broker):
+    broker.submit({'row_index': 0})
+    first = broker.claim('a')
+    assert broker.claim('b') is None
+    assert expire(broker) == 1
+    second = broker.claim('b')
+    assert second['id'] == first['id']
+    assert second['attempts'] == 2
+    assert second['claim'] != first['claim']
+    assert not broker.heartbeat(first)
+    assert broker.heartbeat(second)
+
+
+def test_stale_fail_and_ack_leave_the_new_claim_alone(broker):
+    broker.submit({'row_index': 0})
+    first = broker.claim('a')
+    expire(broker)
+    second = broker.claim('b')
+
+    broker.fail(first, 'lost the claim')
+    broker.ack(first, {'video': 'row_00000.mp4'})
+    assert broker.counts() == {PENDING: 0, CLAIMED: 1, DONE: 0, FAILED: 0}
+    assert broker.heartbeat(second)
+
+    broker.ack(second, {'video': 'row_00000.mp4'})
+    assert broker.counts() == {PENDING: 0, CLAIMED: 0, DONE: 1, FAILED: 0}
+
+
+def test_fail_after_expiry_does_not_requeue_twice(broker):
+    broker.submit({'row_index': 0})
+    job = broker.claim('a')
+    expire(broker)
+    broker.fail(job, 'too late')
+    assert broker.counts()[PENDING] == 1
+
+
+def test_job_fails_after_max_attempts(broker):
+    broker.submit({'row_index': 0})
+    broker.claim('a')
+    expire(broker)
+    job = broker.claim('b')
+    broker.fail(job, 'render failed')
+    assert broker.counts() == {PENDING: 0, CLAIMED: 0, DONE: 0, FAILED: 1}
+
+
+def test_only_abandoned_partial_renders_are_removed(workspace):
+    broker = LocalBroker(visibility_timeout=60)
+    worker = RenderWorker(broker, str(workspace / 'rendered'))
+    abandoned = workspace / 'rendered' / 'tmp_crashed_00003.mp4'
+    in_progress = workspace / 'rendered' / 'tmp_expired_00003.mp4'
+    other_row = workspace / 'rendered' / 'tmp_crashed_00004.mp4'
+    for path in (abandoned, in_progress, other_row):
+        path.write_bytes(b'partial')
+    hour_ago = time.time() - 3600
+    os.utime(abandoned, (hour_ago, hour_ago))
+    os.utime(other_row, (hour_ago, hour_ago))
+
+    worker.remove_abandoned_renders(3)
+    assert not abandoned.exists()
+    assert in_progress.exists()
+    assert other_row.exists()
@@ -0,0 +1,60 @@
+import os
+import time
+import pytest
+from config.settings import Config
+from src.render_cache import RenderCache
+
+INPUTS = {'quote': 'Stay hungry', 'layout': {'width': 1080, 'height': 1920}, 'fps': 30}
+
+
+@pytest.fixture
+def cache(workspace):
+    return RenderCache(max_bytes=250)
+
+
+def add_entry(cache, name, last_used, size=100):
+    """Publish a fake render through put() and backdate its last use"""
+    rendered_path = os.path.join(Config.TEMP_DIR, f"{name}.mp4")
+    with open(rendered_path, 'wb') as f:
+        f.write(b'x' * size)
+    path = cache.put(cache.make_key({'name': name}), rendered_path)
+    os.utime(path, (last_used, last_used))
+    return path
+
+
+def test_key_is_stable_and_ignores_dict_order(cache):
+    key = cache.make_key(INPUTS)
+    assert key == RenderCache().make_key(dict(reversed(list(INPUTS.items()))))
+    assert key == cache.make_key({'fps': 30, 'layout': {'height': 1920, 'width': 1080}, 'quote': 'Stay hungry'})
+    assert key != cache.make_key(dict(INPUTS, fps=60))
+
+
+def test_get_marks_the_entry_used_without_touching_mtime(cache):
+    path = add_entry(cache, 'a', last_used=1000)
+    assert cache.get(cache.make_key({'name': 'a'})) == path
+    stat = os.stat(path)
+    assert stat.st_atime > 1000
+    assert stat.st_mtime == 1000
+    assert cache.get(cache.make_key({'name': 'missing'})) is None
+
+
+def test_evicts_least_recently_used_entries_over_budget(cache, monkeypatch):
+    monkeypatch.setattr(Config, 'RENDER_CACHE_MIN_AGE', 60)
+    now = time.time()
+    oldest = add_entry(cache, 'oldest', now - 300)
+    older = add_entry(cache, 'older', now - 200)
+    # The third entry puts the cache over 250 bytes; only the least recently used one goes
+    newest = add_entry(cache, 'newest', now - 100)
+    assert not os.path.exists(oldest)
+    assert os.path.exists(older) and os.path.exists(newest)
+
+
+def test_recently_used_entries_are_kept_over_budget(cache, monkeypatch):
+    monkeypatch.setattr(Config, 'RENDER_CACHE_MIN_AGE', 3600)
+    now = time.time()
+    paths = [add_entry(cache, name, now - age) for name, age in (('a', 300), ('b', 200), ('c', 100))]
+    assert all(os.path.exists(path) for path in paths)
+
+    monkeypatch.setattr(Config, 'RENDER_CACHE_MIN_AGE', 250)
+    cache.evict()
+    assert [os.path.exists(path) for path in paths] == [False, True, True]
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from config.settings import Config
+from src.job_store import JobStore
+from src.render_planner import RenderPlanner
+
+NOW = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class FakeExcel:
+    def __init__(self, scheduled_times):
+        self.scheduled_times = scheduled_times
+
+    def load_index(self):
+        return {'quotes': {'scheduled_time': self.scheduled_times}}
+
+
+@pytest.fixture
+def planner_for(workspace, monkeypatch):
+    monkeypatch.setattr(Config, 'PLAN_DEFAULT_RENDER_SECONDS', 600)
+    monkeypatch.setattr(Config, 'PLAN_DEFAULT_UPLOAD_SECONDS', 1200)
+    monkeypatch.setattr(Config, 'PLAN_SAFETY_FACTOR', 1)
+    monkeypatch.setattr(Config, 'PLAN_MARGIN_MINUTES', 0)
+
+    def planner_for(publish_times, workers):
+        excel = FakeExcel([publish_at.isoformat() for publish_at in publish_times])
+        return RenderPlanner(excel, JobStore(), workers)
+    return planner_for
+
+
+def test_job_renders_then_uploads_on_one_worker(planner_for):
+    publish_at = NOW + timedelta(hours=2)
+    [entry] = planner_for([publish_at], 1).plan(NOW)
+    assert entry['start_at'] == publish_at - timedelta(minutes=30)
+    assert entry['upload_start'] == publish_at - timedelta(minutes=20)
+    assert not entry['at_risk']
+
+
+def test_burst_is_spread_over_the_workers(planner_for):
+    # Four slots at once on two workers: two jobs run back to back on each worker
+    publish_at = NOW + timedelta(hours=2)
+    plan = planner_for([publish_at] * 4, 2).plan(NOW)
+    starts = sorted(entry['start_at'] for entry in plan)
+    assert starts == [publish_at - timedelta(minutes=60)] * 2 + [publish_at - timedelta(minutes=30)] * 2
+
+
+def test_slot_without_enough_time_is_at_risk(planner_for):
+    publish_at = NOW + timedelta(minutes=20)
+    [entry] = planner_for([publish_at], 2).plan(NOW)
+    assert entry['at_risk']
+    assert entry['start_at'] == NOW
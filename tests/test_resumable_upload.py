@@ -0,0 +1,61 @@
+import os
+import pytest
+import requests
+from fake_youtube import FakeYouTubeServer
+from config.settings import Config
+from src.resumable_upload import ResumableUpload, CHUNK_ALIGNMENT
+
+BODY = {'snippet': {'title': 'test'}}
+
+
+class ProcessKilled(Exception):
+    pass
+
+
+@pytest.fixture
+def server():
+    server = FakeYouTubeServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def video_file(workspace):
+    path = os.path.join(workspace, 'video.mp4')
+    with open(path, 'wb') as f:
+        f.write(os.urandom(4 * CHUNK_ALIGNMENT + 1000))
+    return path
+
+
+def new_upload(server, path, **kwargs):
+    return ResumableUpload(requests.Session(), path, BODY, upload_url=server.upload_url,
+                           chunk_size=CHUNK_ALIGNMENT, **kwargs)
+
+
+def test_upload_resumes_after_process_restart(server, video_file):
+    def kill_after_two_chunks(uploaded, total):
+        if uploaded >= 2 * CHUNK_ALIGNMENT:
+            raise ProcessKilled()
+
+    with pytest.raises(ProcessKilled):
+        new_upload(server, video_file, progress_callback=kill_after_two_chunks).execute()
+    assert len(server.sessions) == 1
+
+    # A fresh uploader, as after a restart, continues the persisted session
+    upload = new_upload(server, video_file)
+    response = upload.execute()
+
+    assert len(server.sessions) == 1
+    assert upload.bytes_sent == os.path.getsize(video_file) - 2 * CHUNK_ALIGNMENT
+    assert response['id'] in server.videos
+    assert not os.path.exists(upload.state_path)
+
+
+def test_failing_chunk_gives_up_after_max_retries(server, video_file, monkeypatch):
+    monkeypatch.setattr(Config, 'UPLOAD_INITIAL_BACKOFF', 0)
+    server.fail_every = 1  # every chunk is answered with a 503; status queries still succeed
+
+    upload = new_upload(server, video_file, max_retries=3)
+    with pytest.raises(requests.HTTPError):
+        upload.execute()
+    assert upload.bytes_sent == 4 * CHUNK_ALIGNMENT
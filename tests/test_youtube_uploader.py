@@ -0,0 +1,79 @@
+from datetime import datetime, timezone
+import pytest
+from config.settings import Config
+from src.youtube_uploader import YouTubeUploader, format_publish_time, future_publish_time
+
+NOW = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, None),
+    (float('nan'), None),
+    ('', None),
+    ('NaT', None),
+    ('2026-05-27 09:00:00', '2026-05-27T09:00:00Z'),
+    ('2026-05-27T09:00:00+02:00', '2026-05-27T07:00:00Z'),
+    ('2026-05-27T09:00:00Z', '2026-05-27T09:00:00Z'),
+    (datetime(2026, 5, 27, 9, 0), '2026-05-27T09:00:00Z'),
+])
+def test_format_publish_time(value, expected):
+    assert format_publish_time(value) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2026-01-01T12:30:00Z', '2026-01-01T12:30:00Z'),
+    ('2026-01-01T12:00:00Z', None),
+    ('2025-05-27 09:00:00', None),
+    (None, None),
+])
+def test_future_publish_time_drops_past_times(value, expected):
+    assert future_publish_time(value, now=NOW) == expected
+
+
+class FakeBatch:
+    def __init__(self, client, callback):
+        self.client = client
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.client.batches.append([request for _, request in self.requests])
+        for request_id, request in self.requests:
+            error = ValueError('quota exceeded') if request_id in self.client.fail_ids else None
+            self.callback(request_id, None if error else request['body'], error)
+
+
+class FakeYouTube:
+    """Records the videos().update calls sent in each batched HTTP request"""
+
+    def __init__(self, fail_ids=()):
+        self.batches = []
+        self.fail_ids = fail_ids
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+    def videos(self):
+        return self
+
+    def update(self, part, body):
+        return {'part': part, 'body': body}
+
+
+def test_batch_update_splits_updates_into_requests_of_batch_size(workspace, monkeypatch):
+    monkeypatch.setattr(Config, 'BATCH_REQUEST_SIZE', 2)
+    uploader = YouTubeUploader()
+    uploader.youtube = FakeYouTube(fail_ids={'v3'})
+    publish_times = {f"v{i}": f"2030-01-0{i + 1} 09:00:00" for i in range(5)}
+
+    errors = uploader.reschedule_videos(publish_times)
+    assert errors == {'v3': 'quota exceeded'}
+    batches = uploader.youtube.batches
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    requests = [request for batch in batches for request in batch]
+    assert [request['body']['id'] for request in requests] == list(publish_times)
+    assert all(request['part'] == 'status' for request in requests)
+    assert requests[4]['body']['status']['publishAt'] == '2030-01-05T09:00:00Z'